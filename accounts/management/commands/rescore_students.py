@@ -0,0 +1,74 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from accounts.models import User
+from accounts.scoring import (
+    SCORE_FORMULA_VERSION,
+    SCORE_INPUT_FIELDS,
+    bulk_write_scores,
+    compute_scores_vectorized,
+)
+from skills.models import ScoreCard
+
+
+class Command(BaseCommand):
+    help = "Recompute scorecards and today's score snapshot for every student in vectorized chunks."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=2000,
+            help="Number of students loaded and scored per batch.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Compute scores without writing scorecards or snapshots.",
+        )
+        parser.add_argument(
+            "--outdated-only",
+            action="store_true",
+            help="Only rescore students whose scorecards are missing or from an older formula version.",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            import numpy  # noqa: F401
+        except ImportError:
+            raise CommandError("rescore_students requires the numpy package.")
+
+        chunk_size = max(1, options["chunk_size"])
+        dry_run = options["dry_run"]
+        recorded_on = timezone.localdate()
+        students = User.objects.filter(role="student")
+        if options["outdated_only"]:
+            cards = ScoreCard.objects.filter(user=OuterRef("pk"))
+            students = students.filter(
+                Exists(cards.exclude(formula_version=SCORE_FORMULA_VERSION)) | ~Exists(cards)
+            )
+        started = time.monotonic()
+        total = 0
+        last_id = 0
+        while True:
+            users = list(
+                students.filter(pk__gt=last_id)
+                .only(*SCORE_INPUT_FIELDS)
+                .order_by("pk")[:chunk_size]
+            )
+            if not users:
+                break
+            last_id = users[-1].pk
+            scores = compute_scores_vectorized(users)
+            if not dry_run:
+                bulk_write_scores(users, scores, recorded_on=recorded_on)
+            total += len(users)
+
+        elapsed = time.monotonic() - started
+        verb = "scored" if dry_run else "rescored"
+        self.stdout.write(
+            self.style.SUCCESS(f"rescore_students: {verb} {total} students in {elapsed:.2f}s")
+        )
@@ -1,14 +1,23 @@
+from concurrent.futures import ThreadPoolExecutor
 from datetime import timedelta
 from urllib.parse import urlparse
-import json
-import os
+import logging
+import threading
 import time
-import urllib.request
-import urllib.error
 
+from django.db import close_old_connections, transaction
+from django.db.models import Count, Q, Sum
 from django.utils import timezone
+from skills.github import GITHUB_API_ROOT, github_json, sync_github_repositories
+from skills.http_transport import http_json
 from skills.models import ScoreCard, Skill, ScoreSnapshot
 
+logger = logging.getLogger(__name__)
+
+# Bump whenever the weights or caps in _compute_scores_and_breakdown change so
+# readers can spot scorecards produced by an older formula.
+SCORE_FORMULA_VERSION = 1
+
 
 def _split_skills(skills_text):
     if not skills_text:
@@ -48,64 +57,42 @@ def _extract_username(url, fallback_segments=1):
         return None
 
 
-def _http_json(method, url, payload=None, headers=None, timeout=8):
-    if headers is None:
-        headers = {}
-    data = None
-    if payload is not None:
-        data = json.dumps(payload).encode("utf-8")
-        headers.setdefault("Content-Type", "application/json")
-    request = urllib.request.Request(url, data=data, headers=headers, method=method)
-    with urllib.request.urlopen(request, timeout=timeout) as response:
-        return json.loads(response.read().decode("utf-8"))
+def _http_json(method, url, payload=None, headers=None, timeout=None):
+    return http_json(method, url, payload=payload, headers=headers, timeout=timeout)
 
 
 def _fetch_github_stats(username):
     if not username:
         return None
-    headers = {
-        "Accept": "application/vnd.github+json",
-        "User-Agent": "skillsence-ai",
-    }
-    token = os.environ.get("GITHUB_TOKEN")
-    if token:
-        headers["Authorization"] = f"Bearer {token}"
-
-    user_url = f"https://api.github.com/users/{username}"
-    repos_url = f"https://api.github.com/users/{username}/repos?per_page=100&sort=updated"
-
-    profile = _http_json("GET", user_url, headers=headers)
-    repos = _http_json("GET", repos_url, headers=headers)
+    user_url = f"{GITHUB_API_ROOT}/users/{username}"
+    profile = github_json(user_url)
+    repos = sync_github_repositories(username, expected_count=profile.get("public_repos"))
 
-    repo_count = len(repos)
-    total_stars = sum(repo.get("stargazers_count", 0) for repo in repos)
-    total_forks = sum(repo.get("forks_count", 0) for repo in repos)
-    languages = sorted({repo.get("language") for repo in repos if repo.get("language")})
-
-    forked_count = sum(1 for repo in repos if repo.get("fork"))
+    recent_cutoff = timezone.now() - timedelta(days=180)
+    totals = repos.aggregate(
+        count=Count("id"),
+        stars=Sum("stargazers_count"),
+        forks=Sum("forks_count"),
+        forked=Count("id", filter=Q(fork=True)),
+        recent=Count("id", filter=Q(pushed_at__gte=recent_cutoff)),
+    )
+    repo_count = totals["count"]
+    total_stars = totals["stars"] or 0
+    total_forks = totals["forks"] or 0
+    forked_count = totals["forked"]
     original_count = max(0, repo_count - forked_count)
     fork_ratio = round(forked_count / repo_count, 3) if repo_count else 0
-
-    language_counts = {}
-    for repo in repos:
-        language = repo.get("language")
-        if not language:
-            continue
-        language_counts[language] = language_counts.get(language, 0) + 1
-    top_languages = sorted(language_counts.items(), key=lambda item: item[1], reverse=True)[:6]
-
-    recent_cutoff = timezone.now() - timedelta(days=180)
-    recent_repos = 0
-    for repo in repos:
-        pushed_at = repo.get("pushed_at")
-        if not pushed_at:
-            continue
-        try:
-            pushed_time = timezone.datetime.fromisoformat(pushed_at.replace("Z", "+00:00"))
-        except ValueError:
-            continue
-        if pushed_time >= recent_cutoff:
-            recent_repos += 1
+    recent_repos = totals["recent"]
+
+    language_rows = (
+        repos.exclude(language="")
+        .values("language")
+        .annotate(repo_count=Count("id"))
+        .order_by("-repo_count", "language")
+    )
+    language_counts = [(row["language"], row["repo_count"]) for row in language_rows]
+    languages = sorted(language for language, _count in language_counts)
+    top_languages = language_counts[:6]
 
     return {
         "profile": {
@@ -472,6 +459,280 @@ def _compute_scores_and_breakdown(user):
     return scores, breakdown
 
 
+SCORE_TYPES = (
+    "coding_skill_index",
+    "communication_score",
+    "authenticity_score",
+    "placement_ready",
+)
+
+SCORE_INPUT_FIELDS = (
+    "id",
+    "role",
+    "student_skills",
+    "phone_number",
+    "college",
+    "cgpa",
+    "github_link",
+    "leetcode_link",
+    "linkedin_link",
+    "codechef_link",
+    "hackerrank_link",
+    "codeforces_link",
+    "gfg_link",
+    "linkedin_headline",
+    "linkedin_about",
+    "linkedin_experience_count",
+    "linkedin_skill_count",
+    "linkedin_cert_count",
+    "github_stats",
+    "leetcode_stats",
+)
+
+_SCORE_INPUT_COLUMNS = (
+    "github_repo_count",
+    "github_stars",
+    "recent_repos",
+    "github_originality",
+    "leetcode_solved",
+    "leetcode_medium",
+    "leetcode_hard",
+    "leetcode_star",
+    "language_match",
+    "linkedin_profile_score",
+    "phone_presence",
+    "skills_count",
+    "college_presence",
+    "github_leetcode_combo",
+    "platform_count",
+    "cgpa_bonus",
+)
+
+
+def _numeric(value):
+    try:
+        return float(value or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _score_inputs(user):
+    skills = _split_skills(user.student_skills)
+    links = [
+        user.github_link,
+        user.leetcode_link,
+        user.linkedin_link,
+        user.codechef_link,
+        user.hackerrank_link,
+        user.codeforces_link,
+        user.gfg_link,
+    ]
+    github_stats = user.github_stats if isinstance(user.github_stats, dict) else {}
+    leetcode_stats = user.leetcode_stats if isinstance(user.leetcode_stats, dict) else {}
+    github_repos = github_stats.get("repos") or {}
+    leetcode_solved = leetcode_stats.get("solved") or {}
+    leetcode_profile = leetcode_stats.get("profile") or {}
+    fork_ratio = _numeric(github_repos.get("fork_ratio"))
+    return (
+        _numeric(github_repos.get("count")),
+        _numeric(github_repos.get("stars")),
+        _numeric(github_repos.get("recent_repos")),
+        round(max(0, 1 - fork_ratio) * 8, 2),
+        _numeric(leetcode_solved.get("all")),
+        _numeric(leetcode_solved.get("medium")),
+        _numeric(leetcode_solved.get("hard")),
+        _numeric(leetcode_profile.get("starRating")),
+        _language_match_bonus(skills, github_repos.get("languages") or []),
+        _linkedin_profile_score(user),
+        10 if user.phone_number else 0,
+        len(skills),
+        10 if user.college else 0,
+        5 if user.github_link and user.leetcode_link else 0,
+        len([link for link in links if link]),
+        _cgpa_bonus(user.cgpa),
+    )
+
+
+def compute_scores_vectorized(users):
+    import numpy as np
+
+    rows = [_score_inputs(user) for user in users]
+    if not rows:
+        return {score_type: np.zeros(0, dtype=np.int64) for score_type in SCORE_TYPES}
+    matrix = np.array(rows, dtype=np.float64)
+    col = {name: matrix[:, index] for index, name in enumerate(_SCORE_INPUT_COLUMNS)}
+
+    # Terms are added in the same order as the scalar dicts so float sums match exactly.
+    coding = np.minimum(32, col["leetcode_solved"] / 4.5)
+    coding = coding + np.minimum(11, col["leetcode_medium"] * 0.55)
+    coding = coding + np.minimum(9, col["leetcode_hard"] * 1.1)
+    coding = coding + np.minimum(18, col["github_repo_count"] * 1.7)
+    coding = coding + np.minimum(11, col["recent_repos"] * 1.7)
+    coding = coding + np.minimum(7, col["github_stars"] / 4.5)
+    coding = coding + col["language_match"]
+    coding = coding + np.minimum(5, col["leetcode_star"] * 1.3)
+
+    communication = np.minimum(40, col["linkedin_profile_score"])
+    communication = communication + col["phone_presence"]
+    communication = communication + np.minimum(20, col["skills_count"] * 2)
+    communication = communication + col["college_presence"]
+
+    authenticity = np.minimum(22, col["github_repo_count"] * 1.7)
+    authenticity = authenticity + np.minimum(18, col["github_stars"] / 3.5)
+    authenticity = authenticity + np.minimum(13, col["recent_repos"] * 1.7)
+    authenticity = authenticity + np.minimum(18, col["leetcode_solved"] / 5.5)
+    authenticity = authenticity + col["github_leetcode_combo"]
+    authenticity = authenticity + np.minimum(9, np.rint(col["linkedin_profile_score"] / 5.5))
+    authenticity = authenticity + np.minimum(10, col["platform_count"] * 2)
+    authenticity = authenticity + col["github_originality"]
+
+    placement = coding * 0.55
+    placement = placement + communication * 0.2
+    placement = placement + authenticity * 0.25
+    placement = placement + col["cgpa_bonus"]
+
+    scale = 0.92
+    totals = {
+        "coding_skill_index": coding,
+        "communication_score": communication,
+        "authenticity_score": authenticity,
+        "placement_ready": placement,
+    }
+    return {
+        score_type: np.minimum(100, np.rint(values * scale)).astype(np.int64)
+        for score_type, values in totals.items()
+    }
+
+
+def bulk_write_scores(users, scores, recorded_on=None):
+    user_ids = [user.id for user in users]
+    if not user_ids:
+        return 0
+    recorded_on = recorded_on or timezone.localdate()
+    previous = {
+        (user_id, score_type): score
+        for user_id, score_type, score in ScoreCard.objects.filter(user_id__in=user_ids).values_list(
+            "user_id", "score_type", "score"
+        )
+    }
+    now = timezone.now()
+    cards = []
+    snapshots = []
+    for index, user_id in enumerate(user_ids):
+        row = {score_type: int(scores[score_type][index]) for score_type in SCORE_TYPES}
+        for score_type, score in row.items():
+            previous_score = previous.get((user_id, score_type))
+            cards.append(ScoreCard(
+                user_id=user_id,
+                score_type=score_type,
+                score=score,
+                change=score - previous_score if previous_score is not None else 0,
+                formula_version=SCORE_FORMULA_VERSION,
+                updated_at=now,
+            ))
+        snapshots.append(ScoreSnapshot(
+            user_id=user_id,
+            recorded_on=recorded_on,
+            scores=row,
+            formula_version=SCORE_FORMULA_VERSION,
+        ))
+    ScoreCard.objects.bulk_create(
+        cards,
+        update_conflicts=True,
+        unique_fields=["user", "score_type"],
+        update_fields=["score", "change", "formula_version", "updated_at"],
+    )
+    ScoreSnapshot.objects.bulk_create(
+        snapshots,
+        update_conflicts=True,
+        unique_fields=["user", "recorded_on"],
+        update_fields=["scores", "formula_version"],
+    )
+    return len(user_ids)
+
+
+_recompute_lock = threading.Lock()
+_recompute_pending = set()
+_recompute_executor = None
+_recompute_failures = 0
+
+
+def scorecards_outdated(cards):
+    return any(card.formula_version != SCORE_FORMULA_VERSION for card in cards)
+
+
+def recompute_student_scores(user_id):
+    from accounts.models import User
+
+    try:
+        user = User.objects.filter(pk=user_id, role="student").only(*SCORE_INPUT_FIELDS).first()
+        if not user:
+            return None
+        scores = calculate_student_scores(user)
+        bulk_write_scores([user], {score_type: [scores[score_type]] for score_type in SCORE_TYPES})
+        return scores
+    finally:
+        with _recompute_lock:
+            _recompute_pending.discard(user_id)
+
+
+def _run_queued_recompute(user_id):
+    global _recompute_failures
+    close_old_connections()
+    try:
+        recompute_student_scores(user_id)
+    except Exception:
+        # The stale scorecard is still served, so this log line and the
+        # failure counter in score_formula_metrics() are the only signals.
+        logger.exception("Score recompute failed for user_id=%s", user_id)
+        with _recompute_lock:
+            _recompute_failures += 1
+    finally:
+        close_old_connections()
+
+
+def _submit_score_recompute(user_id):
+    global _recompute_executor
+    with _recompute_lock:
+        if user_id in _recompute_pending:
+            return
+        _recompute_pending.add(user_id)
+        if _recompute_executor is None:
+            _recompute_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="score-recompute")
+    _recompute_executor.submit(_run_queued_recompute, user_id)
+
+
+def enqueue_score_recompute(user_id):
+    transaction.on_commit(lambda: _submit_score_recompute(user_id))
+
+
+def score_formula_metrics():
+    stale_filter = ~Q(formula_version=SCORE_FORMULA_VERSION)
+    cards = ScoreCard.objects.aggregate(
+        total=Count("id"),
+        stale=Count("id", filter=stale_filter),
+        stale_users=Count("user", filter=stale_filter, distinct=True),
+    )
+    snapshots = ScoreSnapshot.objects.aggregate(
+        total=Count("id"),
+        stale=Count("id", filter=stale_filter),
+    )
+    with _recompute_lock:
+        queue_depth = len(_recompute_pending)
+        failures = _recompute_failures
+    return {
+        "formula_version": SCORE_FORMULA_VERSION,
+        "scorecards_total": cards["total"],
+        "scorecards_outdated": cards["stale"],
+        "students_outdated": cards["stale_users"],
+        "scorecard_mismatch_rate": round(cards["stale"] / cards["total"], 4) if cards["total"] else 0,
+        "snapshots_total": snapshots["total"],
+        "snapshots_outdated": snapshots["stale"],
+        "recompute_queue_depth": queue_depth,
+        "recompute_failures": failures,
+    }
+
+
 def calculate_student_scores(user):
     scores, _breakdown = _compute_scores_and_breakdown(user)
     return scores
@@ -491,7 +752,7 @@ def upsert_scorecards(user):
         ScoreSnapshot.objects.update_or_create(
             user=user,
             recorded_on=today,
-            defaults={"scores": scores},
+            defaults={"scores": scores, "formula_version": SCORE_FORMULA_VERSION},
         )
     for score_type, score in scores.items():
         previous = ScoreCard.objects.filter(user=user, score_type=score_type).first()
@@ -499,6 +760,6 @@ def upsert_scorecards(user):
         ScoreCard.objects.update_or_create(
             user=user,
             score_type=score_type,
-            defaults={"score": score, "change": change},
+            defaults={"score": score, "change": change, "formula_version": SCORE_FORMULA_VERSION},
         )
     return scores
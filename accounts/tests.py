@@ -1,11 +1,16 @@
+import random
+from decimal import Decimal
+
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.core.management import call_command
 from django.test import TestCase
+from django.utils import timezone
 from rest_framework.test import APIClient
 from unittest.mock import patch
 
-from skills.models import Document
+from skills.models import Document, ScoreCard, ScoreSnapshot
 from .models import User
+from .scoring import SCORE_TYPES, calculate_student_scores, compute_scores_vectorized
 
 
 class SignupResumePersistenceTests(TestCase):
@@ -126,3 +131,89 @@ class SignupResumePersistenceTests(TestCase):
         self.assertEqual(university.role, "university")
         self.assertEqual(university.approval_status, "approved")
         self.assertEqual(university.organization_name, "SkillSense University")
+
+
+class RescoreStudentsTests(TestCase):
+    def _random_student(self, rng, index):
+        languages = rng.sample(["Python", "JavaScript", "TypeScript", "Java", "Go", "C++"], rng.randint(0, 4))
+        repo_count = rng.randint(0, 40)
+        forked = rng.randint(0, repo_count)
+        github_stats = rng.choice([
+            None,
+            {"error": "rate limited"},
+            {
+                "repos": {
+                    "count": repo_count,
+                    "stars": rng.randint(0, 120),
+                    "recent_repos": rng.randint(0, repo_count),
+                    "languages": languages,
+                    "forked": forked,
+                    "original": repo_count - forked,
+                    "fork_ratio": round(forked / repo_count, 3) if repo_count else 0,
+                }
+            },
+        ])
+        leetcode_stats = rng.choice([
+            None,
+            {"error": "User not found"},
+            {
+                "solved": {
+                    "all": rng.randint(0, 600),
+                    "easy": rng.randint(0, 200),
+                    "medium": rng.randint(0, 250),
+                    "hard": rng.randint(0, 60),
+                },
+                "profile": {"ranking": rng.randint(1, 500000), "starRating": rng.choice([0, 1, 2.5, 4])},
+            },
+        ])
+        return User(
+            username=f"bulk{index}",
+            email=f"bulk{index}@example.com",
+            role="student",
+            student_skills=", ".join(rng.sample(["Python", "Django", "React", "SQL", "AWS", "Java", "Node"], rng.randint(0, 6))),
+            phone_number=rng.choice([None, "9999999999"]),
+            college=rng.choice([None, "SkillSense University"]),
+            cgpa=rng.choice([None, Decimal("6.5"), Decimal("7.2"), Decimal("8.4"), Decimal("9.1")]),
+            github_link=rng.choice([None, f"https://github.com/bulk{index}"]),
+            leetcode_link=rng.choice([None, f"https://leetcode.com/bulk{index}"]),
+            linkedin_link=rng.choice([None, f"https://linkedin.com/in/bulk{index}"]),
+            codechef_link=rng.choice([None, f"https://codechef.com/users/bulk{index}"]),
+            gfg_link=rng.choice([None, f"https://geeksforgeeks.org/user/bulk{index}"]),
+            linkedin_headline=rng.choice([None, "Backend engineer in training"]),
+            linkedin_about=rng.choice([None, "x" * rng.randint(0, 120)]),
+            linkedin_experience_count=rng.choice([None, 0, 1, 4]),
+            linkedin_skill_count=rng.choice([None, 3, 8, 20]),
+            linkedin_cert_count=rng.choice([None, 0, 2, 5]),
+            github_stats=github_stats,
+            leetcode_stats=leetcode_stats,
+        )
+
+    def test_vectorized_scores_match_scalar_formula(self):
+        rng = random.Random(26)
+        users = [self._random_student(rng, index) for index in range(400)]
+
+        vectorized = compute_scores_vectorized(users)
+
+        for index, user in enumerate(users):
+            expected = calculate_student_scores(user)
+            actual = {score_type: int(vectorized[score_type][index]) for score_type in SCORE_TYPES}
+            self.assertEqual(actual, expected, msg=f"score mismatch for {user.username}")
+
+    def test_rescore_students_command_writes_scorecards_and_snapshot(self):
+        rng = random.Random(27)
+        users = [self._random_student(rng, index) for index in range(5)]
+        for user in users:
+            user.set_password("password123")
+            user.save()
+        ScoreCard.objects.create(user=users[0], score_type="coding_skill_index", score=1, change=0)
+
+        call_command("rescore_students", "--chunk-size", "2")
+
+        for user in users:
+            expected = calculate_student_scores(user)
+            cards = {card.score_type: card.score for card in ScoreCard.objects.filter(user=user)}
+            self.assertEqual(cards, expected)
+            snapshot = ScoreSnapshot.objects.get(user=user, recorded_on=timezone.localdate())
+            self.assertEqual(snapshot.scores, expected)
+        coding_card = ScoreCard.objects.get(user=users[0], score_type="coding_skill_index")
+        self.assertEqual(coding_card.change, coding_card.score - 1)
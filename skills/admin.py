@@ -2,11 +2,16 @@ from django.contrib import admin
 
 from .models import (
     Activity,
+    AIGeneratedRepoResult,
+    AIGeneratedScanJob,
     AIInterviewSession,
     CodeAnalysisReport,
     Document,
+    GitHubRepository,
+    GitHubResponseCache,
     InterviewSchedule,
     InterventionRecord,
+    LLMResponseCache,
     MediaUpload,
     Notification,
     PlacementDrive,
@@ -14,6 +19,8 @@ from .models import (
     RecruiterCandidatePipeline,
     RecruiterJob,
     RecruiterSavedSearch,
+    RepoBlob,
+    RepoFileReview,
     RepoFileSnapshot,
     ScoreCard,
     ScoreSnapshot,
@@ -39,14 +46,14 @@ class ActivityAdmin(admin.ModelAdmin):
 
 @admin.register(ScoreCard)
 class ScoreCardAdmin(admin.ModelAdmin):
-    list_display = ('user', 'score_type', 'score', 'change', 'updated_at')
+    list_display = ('user', 'score_type', 'score', 'change', 'formula_version', 'updated_at')
     list_filter = ('score_type',)
     search_fields = ('user__email', 'user__username')
 
 
 @admin.register(ScoreSnapshot)
 class ScoreSnapshotAdmin(admin.ModelAdmin):
-    list_display = ('user', 'recorded_on', 'created_at')
+    list_display = ('user', 'recorded_on', 'formula_version', 'created_at')
     search_fields = ('user__email', 'user__username')
 
 
@@ -85,10 +92,59 @@ class CodeAnalysisReportAdmin(admin.ModelAdmin):
     search_fields = ('repo_url', 'user__email', 'user__username')
 
 
+@admin.register(AIGeneratedScanJob)
+class AIGeneratedScanJobAdmin(admin.ModelAdmin):
+    list_display = ('user', 'status', 'attempts', 'created_at', 'finished_at')
+    list_filter = ('status',)
+    search_fields = ('user__email', 'user__username')
+
+
+@admin.register(AIGeneratedRepoResult)
+class AIGeneratedRepoResultAdmin(admin.ModelAdmin):
+    list_display = ('user', 'repo_name', 'status', 'pushed_at', 'analyzed_at')
+    list_filter = ('status',)
+    search_fields = ('repo_name', 'user__email', 'user__username')
+
+
+@admin.register(LLMResponseCache)
+class LLMResponseCacheAdmin(admin.ModelAdmin):
+    list_display = ('cache_key', 'kind', 'last_used_at', 'expires_at')
+    list_filter = ('kind',)
+    search_fields = ('cache_key',)
+
+
+@admin.register(RepoBlob)
+class RepoBlobAdmin(admin.ModelAdmin):
+    list_display = ('sha', 'size', 'lines', 'created_at')
+    search_fields = ('sha',)
+    exclude = ('data',)
+
+
+@admin.register(RepoFileReview)
+class RepoFileReviewAdmin(admin.ModelAdmin):
+    list_display = ('path', 'sha', 'review_version', 'lines', 'created_at')
+    list_filter = ('review_version',)
+    search_fields = ('path', 'sha')
+
+
 @admin.register(RepoFileSnapshot)
 class RepoFileSnapshotAdmin(admin.ModelAdmin):
     list_display = ('user', 'repo_url', 'path', 'sha', 'created_at')
     search_fields = ('repo_url', 'path', 'sha', 'user__email', 'user__username')
+    raw_id_fields = ('blob',)
+
+
+@admin.register(GitHubRepository)
+class GitHubRepositoryAdmin(admin.ModelAdmin):
+    list_display = ('owner_login', 'name', 'language', 'stargazers_count', 'fork', 'pushed_at', 'synced_at')
+    list_filter = ('fork', 'language')
+    search_fields = ('owner_login', 'name')
+
+
+@admin.register(GitHubResponseCache)
+class GitHubResponseCacheAdmin(admin.ModelAdmin):
+    list_display = ('url', 'accept', 'etag', 'updated_at')
+    search_fields = ('url', 'etag')
 
 
 @admin.register(MediaUpload)
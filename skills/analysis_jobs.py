@@ -0,0 +1,290 @@
+from datetime import timedelta
+import os
+import time
+
+from django.db.models import F
+from django.utils import timezone
+
+from .github import github_background_priority, sync_github_repositories
+from .models import AIGeneratedRepoResult, AIGeneratedScanJob, CodeAnalysisReport
+from .views import (
+    _analyze_repo_ai_generated,
+    _analyze_repository_work,
+    _extract_github_repo_owner_and_name,
+    _extract_github_username,
+)
+
+_METRIC_DEFAULTS = {
+    "engineering_score": 0,
+    "maintainability_score": 0,
+    "security_score": 0,
+    "testing_score": 0,
+    "documentation_score": 0,
+    "architecture_score": 0,
+    "originality_score": 0,
+    "ai_generated": None,
+    "ai_confidence": 0,
+    "languages": [],
+    "files_analyzed": 0,
+    "files_reused": 0,
+    "similar_repositories": [],
+    "lines_analyzed": 0,
+    "tree_overview": {},
+    "commit_activity": {},
+    "architecture": [],
+    "strengths": [],
+    "risks": [],
+    "recommendations": [],
+    "file_reviews": [],
+    "reviewed_files": [],
+    "ai_review": None,
+    "stars": 0,
+    "forks": 0,
+    "open_issues": 0,
+    "default_branch": None,
+    "pushed_at": None,
+}
+
+
+def _env_int(name, default):
+    try:
+        return int(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def code_analysis_job_timeout():
+    return max(60, _env_int("CODE_ANALYSIS_JOB_TIMEOUT_SECONDS", 900))
+
+
+def code_analysis_max_attempts():
+    return max(1, _env_int("CODE_ANALYSIS_MAX_ATTEMPTS", 3))
+
+
+def code_analysis_metrics(analysis):
+    metrics = {key: analysis.get(key, default) for key, default in _METRIC_DEFAULTS.items()}
+    if analysis.get("partial"):
+        metrics["partial"] = True
+        metrics["files_skipped"] = analysis.get("files_skipped", [])
+    return metrics
+
+
+def _claim_job(model):
+    # Claiming is a conditional UPDATE rather than SELECT ... FOR UPDATE so it
+    # works the same on SQLite and Postgres: whichever worker flips the row from
+    # queued to running first owns it.
+    candidates = (
+        model.objects.filter(status="queued")
+        .order_by("created_at")
+        .values_list("id", flat=True)[:10]
+    )
+    for job_id in candidates:
+        claimed = model.objects.filter(id=job_id, status="queued").update(
+            status="running",
+            started_at=timezone.now(),
+            finished_at=None,
+            attempts=F("attempts") + 1,
+            progress={"stage": "starting"},
+            error="",
+        )
+        if claimed:
+            return model.objects.select_related("user").get(id=job_id)
+    return None
+
+
+def claim_code_analysis_job():
+    return _claim_job(CodeAnalysisReport)
+
+
+def claim_ai_generated_scan_job():
+    return _claim_job(AIGeneratedScanJob)
+
+
+def claim_next_job():
+    # Repository reports are user-facing and short, so they go ahead of
+    # account-wide AI-generated scans.
+    report = claim_code_analysis_job()
+    if report is not None:
+        return "report", report, run_code_analysis_job
+    scan = claim_ai_generated_scan_job()
+    if scan is not None:
+        return "ai-scan", scan, run_ai_generated_scan_job
+    return None
+
+
+def mark_job_failed(job, error):
+    type(job).objects.filter(id=job.id, status="running").update(
+        status="failed",
+        error=error,
+        progress={"stage": "failed"},
+        finished_at=timezone.now(),
+    )
+
+
+def requeue_stale_code_analysis_jobs():
+    cutoff = timezone.now() - timedelta(seconds=code_analysis_job_timeout())
+    recovered = 0
+    for model, message in (
+        (CodeAnalysisReport, "Repository analysis timed out."),
+        (AIGeneratedScanJob, "AI-generated repository scan timed out."),
+    ):
+        stale = model.objects.filter(status="running", started_at__lt=cutoff)
+        recovered += stale.filter(attempts__gte=code_analysis_max_attempts()).update(
+            status="failed",
+            error=message,
+            progress={"stage": "failed"},
+            finished_at=timezone.now(),
+        )
+        recovered += stale.update(status="queued", progress={"stage": "queued"})
+    return recovered
+
+
+def _progress_writer(report_id, min_interval=1.0, model=CodeAnalysisReport):
+    state = {"stage": None, "written_at": 0.0}
+
+    def write(stage, **data):
+        now = time.monotonic()
+        if stage == state["stage"] and now - state["written_at"] < min_interval:
+            return
+        state.update(stage=stage, written_at=now)
+        model.objects.filter(id=report_id, status="running").update(
+            progress={"stage": stage, **data},
+        )
+
+    return write
+
+
+# Worker jobs draw on the GitHub quota at background priority, so they stop at
+# GITHUB_BACKGROUND_RESERVE and leave the rest to interactive requests.
+@github_background_priority()
+def run_code_analysis_job(report):
+    owner, repo = _extract_github_repo_owner_and_name(report.repo_url)
+    try:
+        analysis = _analyze_repository_work(owner, repo, user=report.user, progress=_progress_writer(report.id))
+    except Exception:
+        analysis = {"error": "Unable to analyze repository right now."}
+
+    jobs = CodeAnalysisReport.objects.filter(id=report.id, status="running")
+    if not isinstance(analysis, dict) or analysis.get("error"):
+        jobs.update(
+            status="failed",
+            error=(analysis or {}).get("error") or "Unable to analyze repository",
+            progress={"stage": "failed"},
+            finished_at=timezone.now(),
+        )
+        return "failed"
+
+    # Snapshots are stored under GitHub's canonical URL, which may differ in
+    # case from what the student typed; keep one report per repository.
+    repo_url = analysis.get("repo_url") or report.repo_url
+    CodeAnalysisReport.objects.filter(user_id=report.user_id, repo_url=repo_url).exclude(id=report.id).delete()
+    jobs.update(
+        repo_url=repo_url,
+        summary=analysis.get("summary") or "Repository engineering analysis.",
+        score=analysis.get("engineering_score", 0),
+        metrics=code_analysis_metrics(analysis),
+        status="completed",
+        progress={"stage": "completed"},
+        finished_at=timezone.now(),
+    )
+    return "completed"
+
+
+def ai_generated_scan_max_repos():
+    return max(1, _env_int("AI_GENERATED_SCAN_MAX_REPOS", 100))
+
+
+def _rescan_stale_repositories(job, owner, repositories):
+    # Only repositories pushed since their stored result (or never analyzed,
+    # or failed last time) go back through the LLM; the rest keep their result.
+    results = {result.repo_id: result for result in AIGeneratedRepoResult.objects.filter(user=job.user)}
+    AIGeneratedRepoResult.objects.filter(user=job.user).exclude(
+        repo_id__in=[repository.repo_id for repository in repositories]
+    ).delete()
+    stale = [
+        repository
+        for repository in repositories
+        if repository.repo_id not in results
+        or results[repository.repo_id].status == "failed"
+        or results[repository.repo_id].pushed_at != repository.pushed_at
+    ]
+
+    progress = _progress_writer(job.id, model=AIGeneratedScanJob)
+    for done, repository in enumerate(stale):
+        progress(
+            "analyzing_repos",
+            repos_done=done,
+            repos_total=len(stale),
+            repos_unchanged=len(repositories) - len(stale),
+            current=repository.name,
+        )
+        try:
+            analysis = _analyze_repo_ai_generated(owner, repository.name, user=job.user)
+        except Exception:
+            analysis = {"error": "Unable to analyze repository right now."}
+        failed = not isinstance(analysis, dict) or bool(analysis.get("error"))
+        AIGeneratedRepoResult.objects.update_or_create(
+            user=job.user,
+            repo_id=repository.repo_id,
+            defaults={
+                "repo_name": repository.name,
+                "repo_url": repository.html_url,
+                "pushed_at": repository.pushed_at,
+                "status": "failed" if failed else "completed",
+                "result": {} if failed else analysis,
+                "error": ((analysis or {}).get("error") or "Unable to analyze repository") if failed else "",
+                "analyzed_at": timezone.now(),
+            },
+        )
+    return len(stale)
+
+
+@github_background_priority()
+def run_ai_generated_scan_job(job):
+    jobs = AIGeneratedScanJob.objects.filter(id=job.id, status="running")
+    owner = _extract_github_username(job.user.github_link)
+    if not owner:
+        jobs.update(
+            status="failed",
+            error="GitHub profile is not linked.",
+            progress={"stage": "failed"},
+            finished_at=timezone.now(),
+        )
+        return "failed"
+    try:
+        repositories = list(
+            sync_github_repositories(owner)
+            .order_by(F("pushed_at").desc(nulls_last=True))[:ai_generated_scan_max_repos()]
+        )
+    except Exception:
+        jobs.update(
+            status="failed",
+            error="Unable to list GitHub repositories.",
+            progress={"stage": "failed"},
+            finished_at=timezone.now(),
+        )
+        return "failed"
+
+    try:
+        analyzed = _rescan_stale_repositories(job, owner, repositories)
+    except Exception:
+        jobs.update(
+            status="failed",
+            error="Unable to finish the AI-generated repository scan.",
+            progress={"stage": "failed"},
+            finished_at=timezone.now(),
+        )
+        return "failed"
+
+    finished_at = timezone.now()
+    jobs.update(
+        status="completed",
+        progress={
+            "stage": "completed",
+            "repos_analyzed": analyzed,
+            "repos_unchanged": len(repositories) - analyzed,
+        },
+        finished_at=finished_at,
+    )
+    type(job.user).objects.filter(id=job.user_id).update(last_analyzed_at=finished_at)
+    return "completed"
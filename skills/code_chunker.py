@@ -0,0 +1,143 @@
+from functools import lru_cache
+import hashlib
+import os
+import re
+
+from .similarity import strip_comments
+
+# Splits source files into chunks sized for an LLM prompt. Cuts fall on line
+# boundaries, preferably just before a top-level definition, otherwise after
+# a blank line, so a chunk rarely starts or ends mid-function. Only a single
+# line longer than the whole budget is ever split inside the line.
+
+# Word runs, digit runs, short punctuation runs, newlines and indentation:
+# roughly how BPE vocabularies split source code. No piece spans a line
+# break, so per-line estimates add up to the estimate for the whole text.
+_PIECE_PATTERN = re.compile(r"[A-Za-z_]+|\d{1,3}|[^\w\s]{1,2}|\n|[ \t]{2,}")
+_DEFINITION_PATTERN = re.compile(
+    r"(?:@|(?:export\s+)?(?:default\s+)?(?:async\s+)?(?:def|class|function|interface|enum|struct|impl|trait|func|fn|type|module|namespace)\b"
+    r"|(?:public|private|protected|internal|static|abstract|final)\b"
+    r"|(?:export\s+)?(?:const|let|var)\s+\w+\s*=\s*(?:async\s*)?(?:\(|function\b))"
+)
+# A definition cut is taken only if it keeps at least this share of the
+# budget in the chunk being closed; otherwise the cut moves closer to it.
+_MIN_FILL = 0.5
+_WHITESPACE_PATTERN = re.compile(r"\s+")
+
+
+def _heuristic_tokens(text):
+    pieces = _PIECE_PATTERN.findall(text)
+    # Long identifiers are usually split into several sub-word tokens.
+    return len(pieces) + sum(len(piece) // 8 for piece in pieces if len(piece) > 8)
+
+
+@lru_cache(maxsize=4)
+def _tiktoken_encoder(model):
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("cl100k_base")
+
+
+def estimate_tokens(text):
+    # LLM_TOKENIZER=tiktoken counts exactly when the optional tiktoken
+    # package is installed; the default heuristic needs no dependency.
+    if not text:
+        return 0
+    if os.environ.get("LLM_TOKENIZER", "").strip().lower() == "tiktoken":
+        encoder = _tiktoken_encoder(os.environ.get("OPENAI_MODEL", "gpt-4o-mini"))
+        if encoder is not None:
+            return len(encoder.encode(text, disallowed_special=()))
+    return _heuristic_tokens(text)
+
+
+def _split_long_line(line, max_tokens):
+    # Character slices sized from the line's own characters-per-token ratio.
+    size = max(1, int(len(line) * max_tokens / max(estimate_tokens(line), 1)))
+    return [line[start:start + size] for start in range(0, len(line), size)]
+
+
+def _line_kinds(lines):
+    # 2 = starts a top-level definition, 1 = follows a blank line, 0 = neither.
+    kinds = []
+    previous_blank = True
+    for line in lines:
+        stripped = line.strip()
+        if stripped and not line[0].isspace() and _DEFINITION_PATTERN.match(line):
+            kinds.append(2)
+        elif stripped and previous_blank:
+            kinds.append(1)
+        else:
+            kinds.append(0)
+        previous_blank = not stripped
+    # A decorator or comment block belongs to the definition below it.
+    for index in range(len(lines) - 1, 0, -1):
+        above = lines[index - 1].lstrip()
+        if kinds[index] == 2 and above and not lines[index - 1][0].isspace() and above[0] in "@#/*":
+            kinds[index - 1], kinds[index] = 2, 0
+    return kinds
+
+
+def chunk_code(text, max_tokens, overlap_tokens=0):
+    if not text:
+        return []
+    max_tokens = max(1, max_tokens)
+    # Overlap repeats the previous chunk's tail for context; it is capped so
+    # every chunk still advances by at least half the budget.
+    overlap_tokens = max(0, min(overlap_tokens, max_tokens // 2))
+
+    lines = []
+    for line in text.splitlines(keepends=True):
+        lines.extend(_split_long_line(line, max_tokens) if estimate_tokens(line) > max_tokens else [line])
+    costs = [estimate_tokens(line) for line in lines]
+    kinds = _line_kinds(lines)
+
+    chunks = []
+    start = 0
+    while start < len(lines):
+        end = start
+        spent = 0
+        while end < len(lines) and (end == start or spent + costs[end] <= max_tokens):
+            spent += costs[end]
+            end += 1
+        if end < len(lines):
+            # Walk back to the best boundary that still fills the chunk.
+            floor = max_tokens * _MIN_FILL
+            for wanted in (2, 1):
+                filled = spent
+                cut = None
+                for index in range(end - 1, start, -1):
+                    filled -= costs[index]
+                    if filled < floor:
+                        break
+                    if kinds[index] >= wanted:
+                        cut = index
+                        break
+                if cut is not None:
+                    end = cut
+                    break
+        chunks.append("".join(lines[start:end]))
+        if end >= len(lines):
+            break
+        next_start = end
+        carried = 0
+        while overlap_tokens and next_start - 1 > start and carried + costs[next_start - 1] <= overlap_tokens:
+            next_start -= 1
+            carried += costs[next_start]
+        start = next_start
+    return chunks
+
+
+def normalized_chunk_hash(chunk):
+    # Chunks that differ only in comments, indentation or line wrapping hash
+    # the same, so vendored copies and repeated boilerplate are scored once.
+    # Chunks that are only comments or whitespace have nothing to compare and
+    # get None.
+    normalized = _WHITESPACE_PATTERN.sub(" ", strip_comments(chunk)).strip()
+    if not normalized:
+        return None
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()
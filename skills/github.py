@@ -0,0 +1,457 @@
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+import contextvars
+import hashlib
+import json
+import math
+import os
+import re
+import threading
+import time
+import urllib.error
+
+from django.db import transaction
+from django.utils import timezone
+
+from .http_transport import http_request, open_http_stream
+from .models import GitHubRepository, GitHubResponseCache
+
+GITHUB_API_ROOT = "https://api.github.com"
+GITHUB_JSON_ACCEPT = "application/vnd.github+json"
+GITHUB_RAW_ACCEPT = "application/vnd.github.raw+json"
+
+_LINK_NEXT_PATTERN = re.compile(r'<([^>]+)>;\s*rel="next"')
+_REPOSITORY_FIELDS = (
+    "name",
+    "html_url",
+    "language",
+    "fork",
+    "is_template",
+    "stargazers_count",
+    "forks_count",
+    "pushed_at",
+    "github_updated_at",
+)
+
+PRIORITY_INTERACTIVE = "interactive"
+PRIORITY_BACKGROUND = "background"
+
+_request_priority = contextvars.ContextVar("github_request_priority", default=PRIORITY_INTERACTIVE)
+
+
+class GitHubRateLimitExceeded(Exception):
+    def __init__(self, retry_after):
+        self.retry_after = max(0, int(math.ceil(retry_after)))
+        super().__init__(f"GitHub API rate limit exhausted; retry in {self.retry_after}s.")
+
+
+@contextmanager
+def github_background_priority():
+    token = _request_priority.set(PRIORITY_BACKGROUND)
+    try:
+        yield
+    finally:
+        _request_priority.reset(token)
+
+
+def _env_number(name, default):
+    try:
+        return float(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        return float(default)
+
+
+def _header_int(headers, name):
+    if not headers:
+        return None
+    try:
+        return int(headers.get(name))
+    except (TypeError, ValueError):
+        return None
+
+
+def github_tokens():
+    tokens = []
+    for raw in [*os.environ.get("GITHUB_TOKENS", "").split(","), os.environ.get("GITHUB_TOKEN", "")]:
+        token = raw.strip()
+        if token and token not in tokens:
+            tokens.append(token)
+    return tokens
+
+
+class _TokenQuota:
+    def __init__(self, token):
+        self.token = token
+        self.limit = None
+        self.remaining = None
+        self.reset_at = 0.0
+
+
+# Token bucket in front of every GitHub call. Quotas follow the X-RateLimit-*
+# headers per token; background work stops at the reserve and yields to any
+# interactive caller that is waiting.
+class GitHubRequestScheduler:
+    def __init__(self, tokens, rate_per_second=10, burst=20, background_reserve=200, clock=time.time):
+        self._quotas = [_TokenQuota(token) for token in (tokens or [None])]
+        self._rate = max(0.1, float(rate_per_second))
+        self._burst = max(1.0, float(burst))
+        self._allowance = self._burst
+        self._refilled_at = time.monotonic()
+        self._background_reserve = max(0, int(background_reserve))
+        self._clock = clock
+        self._condition = threading.Condition()
+        self._interactive_waiting = 0
+
+    def _refill(self):
+        now = time.monotonic()
+        self._allowance = min(self._burst, self._allowance + (now - self._refilled_at) * self._rate)
+        self._refilled_at = now
+
+    def _pick_quota(self, priority, now):
+        floor = self._background_reserve if priority == PRIORITY_BACKGROUND else 0
+        best = None
+        for quota in self._quotas:
+            if quota.reset_at and quota.reset_at <= now:
+                quota.remaining = None
+                quota.reset_at = 0.0
+            if quota.remaining is not None and quota.remaining <= floor:
+                continue
+            if best is None or _quota_rank(quota) > _quota_rank(best):
+                best = quota
+        return best
+
+    def _seconds_until_reset(self, now):
+        resets = [quota.reset_at - now for quota in self._quotas if quota.reset_at > now]
+        return min(resets) if resets else 60.0
+
+    def acquire(self, priority=PRIORITY_INTERACTIVE, max_wait=0):
+        deadline = time.monotonic() + max(0, max_wait)
+        with self._condition:
+            if priority == PRIORITY_INTERACTIVE:
+                self._interactive_waiting += 1
+            try:
+                while True:
+                    now = self._clock()
+                    self._refill()
+                    yielding = priority == PRIORITY_BACKGROUND and self._interactive_waiting > 0
+                    quota = None if yielding else self._pick_quota(priority, now)
+                    if quota is not None and self._allowance >= 1:
+                        self._allowance -= 1
+                        if quota.remaining is not None:
+                            quota.remaining -= 1
+                        return quota
+                    if quota is None and not yielding:
+                        wait = self._seconds_until_reset(now)
+                    elif quota is None:
+                        wait = 0.05
+                    else:
+                        wait = (1 - self._allowance) / self._rate
+                    time_left = deadline - time.monotonic()
+                    if time_left <= 0 or (quota is None and not yielding and wait > time_left):
+                        raise GitHubRateLimitExceeded(wait)
+                    self._condition.wait(min(wait, time_left))
+            finally:
+                if priority == PRIORITY_INTERACTIVE:
+                    self._interactive_waiting -= 1
+                    self._condition.notify_all()
+
+    def record(self, quota, status, headers):
+        with self._condition:
+            remaining = _header_int(headers, "X-RateLimit-Remaining")
+            reset_at = _header_int(headers, "X-RateLimit-Reset")
+            limit = _header_int(headers, "X-RateLimit-Limit")
+            retry_after = _header_int(headers, "Retry-After")
+            if remaining is not None:
+                quota.remaining = remaining
+            if reset_at is not None:
+                quota.reset_at = float(reset_at)
+            if limit is not None:
+                quota.limit = limit
+            limited = status in {403, 429} and (retry_after is not None or quota.remaining == 0)
+            if limited:
+                quota.remaining = 0
+                if retry_after is not None:
+                    quota.reset_at = max(quota.reset_at, self._clock() + retry_after)
+            self._condition.notify_all()
+            return limited
+
+    def seconds_until_available(self, quota):
+        return max(0.0, quota.reset_at - self._clock())
+
+    def snapshot(self):
+        with self._condition:
+            now = self._clock()
+            return [
+                {
+                    "token": f"...{quota.token[-4:]}" if quota.token else "anonymous",
+                    "limit": quota.limit,
+                    "remaining": quota.remaining,
+                    "resets_in": max(0, int(quota.reset_at - now)) if quota.reset_at else None,
+                }
+                for quota in self._quotas
+            ]
+
+
+def _quota_rank(quota):
+    return float("inf") if quota.remaining is None else quota.remaining
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def github_scheduler():
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = GitHubRequestScheduler(
+                github_tokens(),
+                rate_per_second=_env_number("GITHUB_REQUESTS_PER_SECOND", 10),
+                burst=_env_number("GITHUB_REQUEST_BURST", 20),
+                background_reserve=_env_number("GITHUB_BACKGROUND_RESERVE", 200),
+            )
+        return _scheduler
+
+
+def _max_wait_for(priority):
+    if priority == PRIORITY_BACKGROUND:
+        return _env_number("GITHUB_BACKGROUND_MAX_WAIT", 600)
+    return _env_number("GITHUB_INTERACTIVE_MAX_WAIT", 5)
+
+
+def github_headers(accept=GITHUB_JSON_ACCEPT, token=None):
+    headers = {
+        "Accept": accept,
+        "User-Agent": "skillsence-ai",
+    }
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+    return headers
+
+
+def _conditional_requests_enabled():
+    return os.environ.get("GITHUB_CONDITIONAL_REQUESTS", "true").strip().lower() in {"1", "true", "yes"}
+
+
+def _cache_key(url, accept):
+    return hashlib.sha256(f"{accept}\n{url}".encode("utf-8")).hexdigest()
+
+
+def _load_cached_response(url, accept):
+    try:
+        return GitHubResponseCache.objects.filter(cache_key=_cache_key(url, accept)).first()
+    except Exception:
+        return None
+
+
+def github_cache_max_age():
+    return max(3600, int(_env_number("GITHUB_CACHE_MAX_AGE_SECONDS", 30 * 24 * 3600)))
+
+
+def github_cache_max_entries():
+    return max(100, int(_env_number("GITHUB_CACHE_MAX_ENTRIES", 50000)))
+
+
+# Every paginated and per-file URL gets a row, so eviction runs every few
+# hundred stores; the table may briefly overshoot the bound by that many rows.
+_EVICT_EVERY = 200
+_stores_since_evict = [0]
+_evict_lock = threading.Lock()
+
+
+def _store_cached_response(url, accept, etag, last_modified, link, body):
+    try:
+        GitHubResponseCache.objects.update_or_create(
+            cache_key=_cache_key(url, accept),
+            defaults={
+                "url": url,
+                "accept": accept,
+                "etag": etag or "",
+                "last_modified": last_modified or "",
+                "link": link or "",
+                "body": body,
+            },
+        )
+    except Exception:
+        return
+    with _evict_lock:
+        _stores_since_evict[0] += 1
+        due = _stores_since_evict[0] >= _EVICT_EVERY
+        if due:
+            _stores_since_evict[0] = 0
+    if due:
+        try:
+            evict_github_response_cache()
+        except Exception:
+            pass
+
+
+def evict_github_response_cache(max_age=None, max_entries=None):
+    # Rows not served or revalidated within max_age go first, then the
+    # least-recently-used rows beyond the bound. A 304 refreshes updated_at.
+    cutoff = timezone.now() - timedelta(seconds=max_age or github_cache_max_age())
+    evicted = GitHubResponseCache.objects.filter(updated_at__lt=cutoff).delete()[0]
+    overflow = GitHubResponseCache.objects.count() - (max_entries or github_cache_max_entries())
+    if overflow > 0:
+        oldest = list(GitHubResponseCache.objects.order_by("updated_at").values_list("id", flat=True)[:overflow])
+        evicted += GitHubResponseCache.objects.filter(id__in=oldest).delete()[0]
+    return evicted
+
+
+def _touch_cached_response(cached):
+    try:
+        cached.save(update_fields=["updated_at"])
+    except Exception:
+        pass
+
+
+def _send_request(url, headers, timeout):
+    response = http_request("GET", url, headers=headers, timeout=timeout)
+    return response.status, response.headers, response.body
+
+
+def _github_get(url, accept, timeout, conditional):
+    scheduler = github_scheduler()
+    priority = _request_priority.get()
+    quota = scheduler.acquire(priority, max_wait=_max_wait_for(priority))
+    headers = github_headers(accept, token=quota.token)
+    conditional = conditional and _conditional_requests_enabled()
+    cached = _load_cached_response(url, accept) if conditional else None
+    if cached is not None:
+        if cached.etag:
+            headers["If-None-Match"] = cached.etag
+        if cached.last_modified:
+            headers["If-Modified-Since"] = cached.last_modified
+
+    try:
+        status, response_headers, body = _send_request(url, headers, timeout)
+    except urllib.error.HTTPError as exc:
+        if scheduler.record(quota, exc.code, exc.headers):
+            raise GitHubRateLimitExceeded(scheduler.seconds_until_available(quota)) from exc
+        raise
+    scheduler.record(quota, status, response_headers)
+    if status == 304 and cached is not None:
+        _touch_cached_response(cached)
+        return cached.body, cached.link
+
+    text = body.decode("utf-8", errors="ignore")
+    response_headers = response_headers or {}
+    etag = response_headers.get("ETag")
+    last_modified = response_headers.get("Last-Modified")
+    link = response_headers.get("Link")
+    if conditional and (etag or last_modified):
+        _store_cached_response(url, accept, etag, last_modified, link, text)
+    return text, link
+
+
+def github_text(url, accept=GITHUB_JSON_ACCEPT, timeout=None, conditional=True):
+    return _github_get(url, accept, timeout, conditional)[0]
+
+
+def github_json(url, timeout=None, conditional=True):
+    return json.loads(github_text(url, timeout=timeout, conditional=conditional))
+
+
+def github_json_page(url, timeout=None, conditional=True):
+    text, link = _github_get(url, GITHUB_JSON_ACCEPT, timeout, conditional)
+    match = _LINK_NEXT_PATTERN.search(link or "")
+    return json.loads(text), match.group(1) if match else None
+
+
+def github_stream(url, accept=GITHUB_JSON_ACCEPT, timeout=None):
+    scheduler = github_scheduler()
+    priority = _request_priority.get()
+    quota = scheduler.acquire(priority, max_wait=_max_wait_for(priority))
+    try:
+        response = open_http_stream(url, headers=github_headers(accept, token=quota.token), timeout=timeout)
+    except urllib.error.HTTPError as exc:
+        if scheduler.record(quota, exc.code, exc.headers):
+            raise GitHubRateLimitExceeded(scheduler.seconds_until_available(quota)) from exc
+        raise
+    scheduler.record(quota, response.status, response.headers)
+    return response
+
+
+def _parse_github_datetime(value):
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+
+
+def _repository_full_sync_days():
+    return max(1, int(_env_number("GITHUB_REPO_FULL_SYNC_DAYS", 7)))
+
+
+def _repository_fields(item):
+    return {
+        "name": item.get("name") or "",
+        "html_url": item.get("html_url") or "",
+        "language": item.get("language") or "",
+        "fork": bool(item.get("fork")),
+        "is_template": bool(item.get("is_template")),
+        "stargazers_count": item.get("stargazers_count") or 0,
+        "forks_count": item.get("forks_count") or 0,
+        "pushed_at": _parse_github_datetime(item.get("pushed_at")),
+        "github_updated_at": _parse_github_datetime(item.get("updated_at")),
+    }
+
+
+def sync_github_repositories(username, expected_count=None):
+    owner = username.lower()
+    existing = {repo.repo_id: repo for repo in GitHubRepository.objects.filter(owner_login=owner)}
+    now = timezone.now()
+    oldest_sync = min((repo.synced_at for repo in existing.values()), default=None)
+    full_sync = (
+        not existing
+        or (expected_count is not None and expected_count != len(existing))
+        or oldest_sync < now - timedelta(days=_repository_full_sync_days())
+    )
+
+    # Listing is newest-updated first, so an incremental refresh can stop at
+    # the first page that reaches a repository unchanged since the last sync.
+    url = f"{GITHUB_API_ROOT}/users/{username}/repos?per_page=100&sort=updated&direction=desc"
+    seen = set()
+    created = []
+    updated = []
+    complete = True
+    while url:
+        page, url = github_json_page(url)
+        if not isinstance(page, list):
+            complete = False
+            break
+        reached_unchanged = False
+        for item in page:
+            repo_id = item.get("id")
+            if repo_id is None or repo_id in seen:
+                continue
+            seen.add(repo_id)
+            fields = _repository_fields(item)
+            current = existing.get(repo_id)
+            if current is None:
+                created.append(GitHubRepository(owner_login=owner, repo_id=repo_id, synced_at=now, **fields))
+                continue
+            if (
+                current.github_updated_at == fields["github_updated_at"]
+                and current.pushed_at == fields["pushed_at"]
+            ):
+                reached_unchanged = True
+                continue
+            for name, value in fields.items():
+                setattr(current, name, value)
+            current.synced_at = now
+            updated.append(current)
+        if reached_unchanged and not full_sync:
+            break
+
+    with transaction.atomic():
+        GitHubRepository.objects.bulk_create(created, ignore_conflicts=True)
+        GitHubRepository.objects.bulk_update(updated, [*_REPOSITORY_FIELDS, "synced_at"], batch_size=500)
+        # Only a listing that came back whole proves a missing repository
+        # is gone; a bad page or an empty listing keeps the stored rows.
+        if full_sync and complete and seen:
+            GitHubRepository.objects.filter(owner_login=owner).exclude(repo_id__in=seen).delete()
+            GitHubRepository.objects.filter(owner_login=owner, repo_id__in=seen).update(synced_at=now)
+    return GitHubRepository.objects.filter(owner_login=owner)
@@ -0,0 +1,275 @@
+from urllib.parse import urljoin, urlsplit
+import gzip
+import http.client
+import io
+import json
+import os
+import random
+import select
+import threading
+import time
+import urllib.error
+import urllib.request
+import zlib
+
+RETRYABLE_STATUSES = {500, 502, 503, 504}
+REDIRECT_STATUSES = {301, 302, 303, 307, 308}
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+# Per-host defaults; OUTBOUND_HTTP_TIMEOUTS / OUTBOUND_HTTP_RETRIES override them
+# with "host=value" lists, e.g. "api.github.com=15,leetcode.com=5".
+_ENDPOINT_POLICIES = {
+    "api.github.com": {"timeout": 10, "retries": 2, "retry_unsafe": False},
+    "codeload.github.com": {"timeout": 30, "retries": 2, "retry_unsafe": False},
+    "leetcode.com": {"timeout": 8, "retries": 1, "retry_unsafe": True},
+    "api.openai.com": {"timeout": 20, "retries": 0, "retry_unsafe": False},
+}
+_DEFAULT_POLICY = {"timeout": 10, "retries": 1, "retry_unsafe": False}
+
+
+def _env_host_map(name):
+    mapping = {}
+    for item in os.environ.get(name, "").split(","):
+        host, _, value = item.partition("=")
+        try:
+            mapping[host.strip().lower()] = float(value)
+        except ValueError:
+            continue
+    return mapping
+
+
+def endpoint_policy(host):
+    host = (host or "").lower()
+    policy = dict(_ENDPOINT_POLICIES.get(host, _DEFAULT_POLICY))
+    timeout = _env_host_map("OUTBOUND_HTTP_TIMEOUTS").get(host)
+    retries = _env_host_map("OUTBOUND_HTTP_RETRIES").get(host)
+    if timeout:
+        policy["timeout"] = timeout
+    if retries is not None:
+        policy["retries"] = max(0, int(retries))
+    return policy
+
+
+def _pool_size():
+    try:
+        return max(1, int(os.environ.get("OUTBOUND_HTTP_POOL_SIZE", "8")))
+    except (TypeError, ValueError):
+        return 8
+
+
+class HTTPResponse:
+    def __init__(self, url, status, reason, headers, body):
+        self.url = url
+        self.status = status
+        self.reason = reason
+        self.headers = headers
+        self.body = body
+
+    def json(self):
+        return json.loads(self.body.decode("utf-8"))
+
+
+class _ConnectionPool:
+    def __init__(self):
+        self._idle = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, key, timeout):
+        with self._lock:
+            idle = self._idle.get(key) or []
+            connection = idle.pop() if idle else None
+        if connection is not None:
+            connection.timeout = timeout
+            if connection.sock is not None:
+                connection.sock.settimeout(timeout)
+            return connection, True
+        return _new_connection(key, timeout), False
+
+    def release(self, key, connection):
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < _pool_size():
+                idle.append(connection)
+                return
+        connection.close()
+
+    def clear(self):
+        with self._lock:
+            connections = [connection for idle in self._idle.values() for connection in idle]
+            self._idle = {}
+        for connection in connections:
+            connection.close()
+
+
+def _new_connection(key, timeout):
+    scheme, host, port = key
+    proxy = urllib.request.getproxies().get(scheme)
+    if proxy and not urllib.request.proxy_bypass(host):
+        proxy_parts = urlsplit(proxy)
+        proxy_host, proxy_port = proxy_parts.hostname, proxy_parts.port or 80
+        if scheme == "https":
+            connection = http.client.HTTPSConnection(proxy_host, proxy_port, timeout=timeout)
+            connection.set_tunnel(host, port)
+            return connection
+        return http.client.HTTPConnection(proxy_host, proxy_port, timeout=timeout)
+    if scheme == "https":
+        return http.client.HTTPSConnection(host, port, timeout=timeout)
+    return http.client.HTTPConnection(host, port, timeout=timeout)
+
+
+_pool = _ConnectionPool()
+
+
+def _decode_body(headers, body):
+    encoding = (headers.get("Content-Encoding") or "").strip().lower()
+    if encoding == "gzip":
+        return gzip.decompress(body)
+    if encoding == "deflate":
+        return zlib.decompress(body)
+    return body
+
+
+def _connection_dropped(connection):
+    # An idle keep-alive socket has nothing to read; if it is readable the
+    # server closed it (EOF) or broke protocol, and it must not be reused.
+    if connection.sock is None:
+        return False
+    try:
+        readable, _, _ = select.select([connection.sock], [], [], 0)
+    except (OSError, ValueError):
+        return True
+    return bool(readable)
+
+
+def _send_once(method, url, body, headers, timeout):
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    port = parts.port or (443 if scheme == "https" else 80)
+    key = (scheme, parts.hostname, port)
+    target = parts.path or "/"
+    if parts.query:
+        target = f"{target}?{parts.query}"
+    if scheme == "http" and urllib.request.getproxies().get("http") and not urllib.request.proxy_bypass(parts.hostname):
+        target = url
+
+    # A pooled connection the server closed while idle is replaced before
+    # anything is written to it. One that fails mid-request may already have
+    # delivered the request, so only idempotent methods are resent on a fresh
+    # connection (without counting as a retry); http_request decides the rest.
+    for _attempt in range(2):
+        connection, reused = _pool.acquire(key, timeout)
+        if reused and _connection_dropped(connection):
+            connection.close()
+            connection, reused = _new_connection(key, timeout), False
+        try:
+            connection.request(method, target, body=body, headers=headers)
+            response = connection.getresponse()
+            raw = response.read()
+        except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+            connection.close()
+            if reused and method in IDEMPOTENT_METHODS:
+                continue
+            raise
+        except Exception:
+            connection.close()
+            raise
+        if response.will_close:
+            connection.close()
+        else:
+            _pool.release(key, connection)
+        return HTTPResponse(url, response.status, response.reason, response.headers, _decode_body(response.headers, raw))
+    raise http.client.RemoteDisconnected("Remote end closed connection without response")
+
+
+def _backoff_delay(attempt):
+    return min(8.0, 0.3 * (2 ** attempt)) * (0.5 + random.random() / 2)
+
+
+def _sleep(seconds):
+    time.sleep(seconds)
+
+
+def http_request(method, url, body=None, headers=None, timeout=None, retries=None):
+    method = method.upper()
+    request_headers = {"Accept-Encoding": "gzip", "Connection": "keep-alive"}
+    request_headers.update(headers or {})
+    policy = endpoint_policy(urlsplit(url).hostname)
+    timeout = timeout or policy["timeout"]
+    retries = policy["retries"] if retries is None else retries
+    can_retry = method in IDEMPOTENT_METHODS or policy["retry_unsafe"]
+
+    redirects = 0
+    attempt = 0
+    while True:
+        try:
+            response = _send_once(method, url, body, request_headers, timeout)
+        except (OSError, http.client.HTTPException):
+            if not can_retry or attempt >= retries:
+                raise
+            _sleep(_backoff_delay(attempt))
+            attempt += 1
+            continue
+
+        if response.status in REDIRECT_STATUSES and response.headers.get("Location") and redirects < 5:
+            location = urljoin(url, response.headers["Location"])
+            if urlsplit(location).hostname != urlsplit(url).hostname:
+                request_headers.pop("Authorization", None)
+            if response.status == 303 or (response.status in {301, 302} and method == "POST"):
+                method, body = "GET", None
+            url = location
+            redirects += 1
+            continue
+        if response.status in RETRYABLE_STATUSES and can_retry and attempt < retries:
+            _sleep(_backoff_delay(attempt))
+            attempt += 1
+            continue
+        if response.status >= 400:
+            raise urllib.error.HTTPError(url, response.status, response.reason, response.headers, io.BytesIO(response.body))
+        return response
+
+
+def open_http_stream(url, headers=None, timeout=None):
+    # Large downloads (repository archives) are read incrementally by the
+    # caller, so they bypass the pool and own their connection until closed.
+    request_headers = {"Connection": "close"}
+    request_headers.update(headers or {})
+    timeout = timeout or endpoint_policy(urlsplit(url).hostname)["timeout"]
+    for _redirect in range(6):
+        parts = urlsplit(url)
+        scheme = parts.scheme.lower()
+        port = parts.port or (443 if scheme == "https" else 80)
+        target = parts.path or "/"
+        if parts.query:
+            target = f"{target}?{parts.query}"
+        connection = _new_connection((scheme, parts.hostname, port), timeout)
+        try:
+            connection.request("GET", target, headers=request_headers)
+            response = connection.getresponse()
+        except Exception:
+            connection.close()
+            raise
+        location = response.headers.get("Location")
+        if response.status in REDIRECT_STATUSES and location:
+            response.close()
+            connection.close()
+            location = urljoin(url, location)
+            if urlsplit(location).hostname != parts.hostname:
+                request_headers.pop("Authorization", None)
+            url = location
+            continue
+        if response.status >= 400:
+            body = response.read()
+            connection.close()
+            raise urllib.error.HTTPError(url, response.status, response.reason, response.headers, io.BytesIO(body))
+        return response
+    connection.close()
+    raise urllib.error.HTTPError(url, 310, "Too many redirects", response.headers, io.BytesIO(b""))
+
+
+def http_json(method, url, payload=None, headers=None, timeout=None):
+    headers = dict(headers or {})
+    data = None
+    if payload is not None:
+        data = json.dumps(payload).encode("utf-8")
+        headers.setdefault("Content-Type", "application/json")
+    return http_request(method, url, body=data, headers=headers, timeout=timeout).json()
@@ -0,0 +1,128 @@
+from datetime import timedelta
+import hashlib
+import json
+import os
+import threading
+
+from django.db import DatabaseError
+from django.utils import timezone
+
+from .models import LLMResponseCache
+
+
+def _env_int(name, default):
+    try:
+        return int(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def llm_cache_enabled():
+    return os.environ.get("LLM_CACHE_ENABLED", "true").strip().lower() not in {"0", "false", "no", "off"}
+
+
+def llm_cache_ttl():
+    return max(60, _env_int("LLM_CACHE_TTL_SECONDS", 7 * 24 * 3600))
+
+
+def llm_cache_max_entries():
+    return max(100, _env_int("LLM_CACHE_MAX_ENTRIES", 20000))
+
+
+# Eviction is a couple of DELETEs, so it runs every few stores rather than on
+# each one; the table may briefly overshoot the bound by that many rows.
+_EVICT_EVERY = 50
+# Recency is only rewritten when it is this stale, so hot keys do not turn
+# every cache hit into an UPDATE.
+_TOUCH_AFTER = timedelta(minutes=5)
+
+_stats_lock = threading.Lock()
+_stats = {}
+_evictions = [0]
+_stores_since_evict = [0]
+
+
+def _count(kind, event, amount=1):
+    with _stats_lock:
+        bucket = _stats.setdefault(kind or "chat", {"hits": 0, "misses": 0, "stores": 0})
+        bucket[event] += amount
+
+
+def llm_cache_key(*parts):
+    raw = json.dumps(parts, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def llm_cache_get(key, kind=""):
+    if not llm_cache_enabled():
+        return None
+    now = timezone.now()
+    try:
+        entry = LLMResponseCache.objects.filter(cache_key=key, expires_at__gt=now).first()
+        if entry is None:
+            _count(kind, "misses")
+            return None
+        if now - entry.last_used_at > _TOUCH_AFTER:
+            LLMResponseCache.objects.filter(id=entry.id).update(last_used_at=now)
+    except DatabaseError:
+        return None
+    _count(kind, "hits")
+    return entry.response
+
+
+def llm_cache_set(key, response, kind="", ttl=None):
+    if not llm_cache_enabled() or response is None:
+        return
+    now = timezone.now()
+    try:
+        LLMResponseCache.objects.update_or_create(
+            cache_key=key,
+            defaults={
+                "kind": kind,
+                "response": response,
+                "last_used_at": now,
+                "expires_at": now + timedelta(seconds=ttl or llm_cache_ttl()),
+            },
+        )
+    except DatabaseError:
+        return
+    _count(kind, "stores")
+    with _stats_lock:
+        _stores_since_evict[0] += 1
+        due = _stores_since_evict[0] >= _EVICT_EVERY
+        if due:
+            _stores_since_evict[0] = 0
+    if due:
+        evict_llm_cache()
+
+
+def evict_llm_cache(max_entries=None):
+    # Expired rows go first, then least-recently-used rows beyond the bound.
+    max_entries = max_entries or llm_cache_max_entries()
+    evicted = LLMResponseCache.objects.filter(expires_at__lte=timezone.now()).delete()[0]
+    overflow = LLMResponseCache.objects.count() - max_entries
+    if overflow > 0:
+        oldest = list(LLMResponseCache.objects.order_by("last_used_at").values_list("id", flat=True)[:overflow])
+        evicted += LLMResponseCache.objects.filter(id__in=oldest).delete()[0]
+    with _stats_lock:
+        _evictions[0] += evicted
+    return evicted
+
+
+def llm_cache_metrics():
+    with _stats_lock:
+        kinds = {kind: dict(bucket) for kind, bucket in _stats.items()}
+        evictions = _evictions[0]
+    for bucket in kinds.values():
+        lookups = bucket["hits"] + bucket["misses"]
+        bucket["hit_rate"] = round(bucket["hits"] / lookups, 4) if lookups else 0
+    hits = sum(bucket["hits"] for bucket in kinds.values())
+    lookups = hits + sum(bucket["misses"] for bucket in kinds.values())
+    return {
+        "enabled": llm_cache_enabled(),
+        "entries": LLMResponseCache.objects.count(),
+        "max_entries": llm_cache_max_entries(),
+        "hit_rate": round(hits / lookups, 4) if lookups else 0,
+        "evictions": evictions,
+        "kinds": kinds,
+    }
@@ -0,0 +1,221 @@
+from contextlib import contextmanager
+import contextvars
+import http.client
+import json
+import os
+import random
+import threading
+import time
+import urllib.error
+
+from .http_transport import http_request
+
+DEFAULT_CHAT_COMPLETIONS_URL = "https://api.openai.com/v1/chat/completions"
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+# Absolute time.monotonic() by which every LLM call in this context must be
+# finished. Views and analyses set it; worker pools inherit it through
+# contextvars.copy_context().
+_deadline = contextvars.ContextVar("llm_deadline", default=None)
+
+
+def _env_number(name, default):
+    try:
+        return float(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def llm_timeout():
+    return max(1.0, _env_number("LLM_TIMEOUT_SECONDS", 20))
+
+
+def llm_max_retries():
+    return max(0, int(_env_number("LLM_MAX_RETRIES", 2)))
+
+
+def llm_request_deadline():
+    return max(1.0, _env_number("LLM_REQUEST_DEADLINE_SECONDS", 45))
+
+
+@contextmanager
+def llm_deadline(seconds=None, at=None):
+    # Also usable as a view decorator: `@llm_deadline()` gives every LLM call
+    # made while serving the request a shared LLM_REQUEST_DEADLINE_SECONDS
+    # budget. A nested deadline can only shorten the outer one.
+    if at is None:
+        at = time.monotonic() + (seconds if seconds is not None else llm_request_deadline())
+    outer = _deadline.get()
+    token = _deadline.set(at if outer is None else min(at, outer))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+class LLMCircuitBreaker:
+    # Closed: calls flow. After LLM_CIRCUIT_FAILURES consecutive transient
+    # failures it opens and every call is skipped until the cool-down ends.
+    # Then one probe is let through (half-open); its outcome closes the
+    # breaker or opens it for another cool-down.
+    def __init__(self, threshold=None, cooldown=None, clock=time.monotonic):
+        self._threshold = threshold
+        self._cooldown = cooldown
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._open_until = 0.0
+        self._probing = False
+        self._stats = {"requests": 0, "retries": 0, "failures": 0, "short_circuits": 0, "opened": 0}
+
+    def threshold(self):
+        return self._threshold or max(1, int(_env_number("LLM_CIRCUIT_FAILURES", 5)))
+
+    def cooldown(self):
+        return self._cooldown or max(1.0, _env_number("LLM_CIRCUIT_COOLDOWN_SECONDS", 60))
+
+    def allow(self):
+        with self._lock:
+            if self._failures < self.threshold():
+                return True
+            if self._clock() >= self._open_until and not self._probing:
+                self._probing = True
+                return True
+            self._stats["short_circuits"] += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self._stats["failures"] += 1
+            self._failures += 1
+            if self._probing or self._failures == self.threshold():
+                self._open_until = self._clock() + self.cooldown()
+                self._stats["opened"] += 1
+            self._probing = False
+
+    def release(self):
+        # Gives back a half-open probe that ended without saying anything
+        # about the API's health, so the next call can probe instead.
+        with self._lock:
+            self._probing = False
+
+    def count(self, event):
+        with self._lock:
+            self._stats[event] += 1
+
+    def reset(self):
+        with self._lock:
+            self._failures = 0
+            self._open_until = 0.0
+            self._probing = False
+            self._stats = {key: 0 for key in self._stats}
+
+    def snapshot(self):
+        with self._lock:
+            if self._failures < self.threshold():
+                state = "closed"
+            elif self._clock() >= self._open_until:
+                state = "half_open"
+            else:
+                state = "open"
+            return {
+                "state": state,
+                "consecutive_failures": self._failures,
+                "open_for_seconds": round(max(0.0, self._open_until - self._clock()), 1) if state == "open" else 0,
+                **self._stats,
+            }
+
+
+_breaker = LLMCircuitBreaker()
+
+
+def llm_circuit_breaker():
+    return _breaker
+
+
+def _backoff_delay(attempt, retry_after=None):
+    # Full jitter keeps workers that failed together from retrying together.
+    if retry_after is not None:
+        return retry_after + random.uniform(0, 0.5)
+    return random.uniform(0, min(8.0, 0.5 * (2 ** attempt)))
+
+
+def _sleep(seconds):
+    time.sleep(seconds)
+
+
+def _retry_after(headers):
+    try:
+        return max(0.0, float((headers or {}).get("Retry-After")))
+    except (TypeError, ValueError):
+        return None
+
+
+def llm_chat_completion(payload, api_key, url=None):
+    # Returns the decoded completion, {"error": {...}} for a request the API
+    # rejected outright, or None when the LLM is unreachable, the deadline is
+    # spent, or the circuit is open.
+    url = url or DEFAULT_CHAT_COMPLETIONS_URL
+    breaker = llm_circuit_breaker()
+    deadline = _deadline.get()
+    if deadline is None:
+        deadline = time.monotonic() + llm_request_deadline()
+    if deadline - time.monotonic() <= 0.05 or not breaker.allow():
+        return None
+    body = json.dumps(payload).encode("utf-8")
+    headers = {
+        "Authorization": f"Bearer {api_key}",
+        "Accept": "application/json",
+        "Content-Type": "application/json",
+        "User-Agent": "skillsence-ai",
+    }
+    attempt = 0
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0.05:
+            # Running out of our own budget is not an API failure.
+            breaker.release()
+            return None
+        breaker.count("requests")
+        retry_after = None
+        timeout = llm_timeout()
+        clipped = remaining < timeout
+        try:
+            response = http_request("POST", url, body=body, headers=headers, timeout=min(timeout, remaining), retries=0)
+            data = response.json()
+        except urllib.error.HTTPError as exc:
+            if exc.code not in RETRYABLE_STATUSES:
+                # The API answered; a bad request says nothing about its health.
+                breaker.record_success()
+                try:
+                    error_body = exc.read().decode("utf-8", errors="ignore")
+                except Exception:
+                    error_body = ""
+                return {"error": {"status": exc.code, "body": error_body}}
+            retry_after = _retry_after(exc.headers)
+        except (OSError, http.client.HTTPException, ValueError) as exc:
+            if clipped and isinstance(exc, TimeoutError):
+                # Only a timeout after the full LLM_TIMEOUT_SECONDS counts
+                # against the API; this one was cut short by the deadline.
+                breaker.release()
+                return None
+        else:
+            breaker.record_success()
+            return data
+
+        delay = _backoff_delay(attempt, retry_after)
+        if attempt >= llm_max_retries() or time.monotonic() + delay >= deadline:
+            breaker.record_failure()
+            return None
+        breaker.count("retries")
+        _sleep(delay)
+        attempt += 1
+
+
+def llm_client_metrics():
+    return llm_circuit_breaker().snapshot()
@@ -0,0 +1,105 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import hashlib
+import json
+import re
+import threading
+import time
+
+# A minimal OpenAI-compatible chat-completions endpoint. Replies depend only
+# on the prompt, so tests and benchmarks get the same scores on every run
+# without network access or API spend. Point OPENAI_API_BASE at
+# http://<host>:<port>/v1/chat/completions to use it.
+
+_ITEM_PATTERN = re.compile(r"^### Item (\d+)$", re.M)
+
+
+def _stub_score(text):
+    score = int(hashlib.sha256(text.encode("utf-8")).hexdigest()[:8], 16) % 101
+    label = "likely" if score >= 70 else "possible" if score >= 40 else "unlikely"
+    return {"score": score, "label": label, "rationale": "stub reply"}
+
+
+def stub_reply(messages):
+    prompt = "\n".join(str(message.get("content") or "") for message in messages if message.get("role") == "user")
+    items = _ITEM_PATTERN.split(prompt)
+    if len(items) > 1:
+        # items is [preamble, id, text, id, text, ...]
+        return {"results": [{"id": int(number), **_stub_score(text)} for number, text in zip(items[1::2], items[2::2])]}
+    return _stub_score(prompt)
+
+
+class LLMStubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, latency=0.0, fail_first=0, fail_every=0, fail_status=503):
+        super().__init__(address, _LLMStubHandler)
+        self.latency = latency
+        self.fail_first = fail_first
+        self.fail_every = fail_every
+        self.fail_status = fail_status
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1/chat/completions"
+
+    def next_request_fails(self):
+        with self._lock:
+            self.requests += 1
+            number = self.requests
+        if number <= self.fail_first:
+            return True
+        return bool(self.fail_every) and number % self.fail_every == 0
+
+
+class _LLMStubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            payload = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            payload = {}
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send(404, {"error": {"message": "Unknown endpoint."}})
+        elif self.server.next_request_fails():
+            status = self.server.fail_status
+            self._send(status, {"error": {"message": "Stub failure."}}, {"Retry-After": "0"} if status == 429 else None)
+        else:
+            content = json.dumps(stub_reply(payload.get("messages") or []))
+            self._send(200, {
+                "id": "chatcmpl-stub",
+                "object": "chat.completion",
+                "model": payload.get("model") or "stub",
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+                "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+            })
+
+    def _send(self, status, body, headers=None):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        try:
+            self.end_headers()
+            self.wfile.write(data)
+        except (BrokenPipeError, ConnectionResetError):
+            # The client gave up (timeout or deadline) before the reply.
+            self.close_connection = True
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_llm_stub(host="127.0.0.1", port=0, **options):
+    # Serves from a daemon thread; call shutdown() and server_close() when done.
+    server = LLMStubServer((host, port), **options)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
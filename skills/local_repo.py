@@ -0,0 +1,249 @@
+import os
+import shutil
+import subprocess
+import tempfile
+from contextlib import contextmanager
+
+from .views import (
+    _build_repository_report,
+    _load_file_reviews,
+    _load_repo_blobs,
+    _select_repo_files_for_review,
+)
+
+_GIT_TIMEOUT = 120
+_COMMIT_SAMPLE = 20
+
+# Rough stand-in for GitHub's linguist breakdown: bytes per language by
+# extension, top five kept, same shape as the languages API result.
+_LANGUAGE_BY_EXTENSION = {
+    ".py": "Python",
+    ".js": "JavaScript",
+    ".jsx": "JavaScript",
+    ".mjs": "JavaScript",
+    ".ts": "TypeScript",
+    ".tsx": "TypeScript",
+    ".java": "Java",
+    ".kt": "Kotlin",
+    ".go": "Go",
+    ".rs": "Rust",
+    ".rb": "Ruby",
+    ".php": "PHP",
+    ".c": "C",
+    ".h": "C",
+    ".cpp": "C++",
+    ".cc": "C++",
+    ".hpp": "C++",
+    ".cs": "C#",
+    ".swift": "Swift",
+    ".dart": "Dart",
+    ".html": "HTML",
+    ".css": "CSS",
+    ".scss": "SCSS",
+    ".sh": "Shell",
+    ".sql": "SQL",
+    ".ipynb": "Jupyter Notebook",
+}
+
+
+class LocalRepositoryError(Exception):
+    pass
+
+
+def _git(git_dir, *args, input=None):
+    try:
+        completed = subprocess.run(
+            ["git", "--git-dir", git_dir, *args],
+            input=input,
+            capture_output=True,
+            timeout=_GIT_TIMEOUT,
+            check=False,
+        )
+    except (OSError, subprocess.TimeoutExpired) as exc:
+        raise LocalRepositoryError(f"git {args[0]} failed: {exc}") from exc
+    if completed.returncode != 0:
+        message = completed.stderr.decode("utf-8", errors="ignore").strip()
+        raise LocalRepositoryError(message or f"git {args[0]} failed.")
+    return completed.stdout
+
+
+def _point_head_at_branch(git_dir):
+    # Bundles created from a branch name carry no HEAD, so a bare clone of one
+    # has a dangling HEAD; point it at the first branch the bundle did carry.
+    try:
+        _git(git_dir, "rev-parse", "--verify", "--quiet", "HEAD")
+        return
+    except LocalRepositoryError:
+        pass
+    branches = _git(git_dir, "for-each-ref", "--format=%(refname)", "refs/heads").decode("utf-8").split()
+    if branches:
+        _git(git_dir, "symbolic-ref", "HEAD", branches[0])
+
+
+@contextmanager
+def open_local_repository(path):
+    # Yields a git directory for a working tree, a bare repository, or a
+    # bundle file. Bundles are cloned bare into a temporary directory that is
+    # removed afterwards.
+    path = os.path.abspath(path)
+    if os.path.isfile(path):
+        workdir = tempfile.mkdtemp(prefix="repo-bundle-")
+        try:
+            git_dir = os.path.join(workdir, "repo.git")
+            try:
+                subprocess.run(
+                    ["git", "clone", "--quiet", "--bare", path, git_dir],
+                    capture_output=True,
+                    timeout=_GIT_TIMEOUT,
+                    check=True,
+                )
+            except (OSError, subprocess.SubprocessError) as exc:
+                raise LocalRepositoryError("Unable to read git bundle.") from exc
+            _point_head_at_branch(git_dir)
+            yield git_dir
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+        return
+    if not os.path.isdir(path):
+        raise LocalRepositoryError("Repository path does not exist.")
+    dot_git = os.path.join(path, ".git")
+    yield dot_git if os.path.exists(dot_git) else path
+
+
+def _list_tree(git_dir, ref):
+    files = []
+    output = _git(git_dir, "ls-tree", "-r", "-l", "-z", ref)
+    for entry in output.split(b"\0"):
+        if not entry:
+            continue
+        meta, _, path = entry.partition(b"\t")
+        _mode, kind, sha, size = meta.split()
+        if kind != b"blob":
+            continue
+        files.append({
+            "type": "blob",
+            "path": path.decode("utf-8", errors="replace"),
+            "sha": sha.decode("ascii"),
+            "size": int(size) if size.isdigit() else 0,
+        })
+    return files
+
+
+def _read_blobs(git_dir, shas):
+    # One `git cat-file --batch` process serves every object: each reply is
+    # "<sha> <type> <size>\n<data>\n" in request order.
+    shas = list(dict.fromkeys(sha for sha in shas if sha))
+    if not shas:
+        return {}
+    output = _git(git_dir, "cat-file", "--batch", input="".join(f"{sha}\n" for sha in shas).encode("ascii"))
+    blobs = {}
+    position = 0
+    for sha in shas:
+        header_end = output.index(b"\n", position)
+        header = output[position:header_end].split()
+        position = header_end + 1
+        if len(header) < 3 or header[1] == b"missing":
+            continue
+        size = int(header[2])
+        blobs[sha] = output[position:position + size].decode("utf-8", errors="ignore")
+        position += size + 1
+    return blobs
+
+
+def _read_commits(git_dir, ref):
+    # Shaped like the GitHub commits API so the shared report code can read it.
+    output = _git(
+        git_dir,
+        "log",
+        f"-n{_COMMIT_SAMPLE}",
+        "--format=%H%x00%an%x00%cI%x00%B%x1e",
+        ref,
+    ).decode("utf-8", errors="ignore")
+    commits = []
+    for record in output.split("\x1e"):
+        fields = record.strip("\n").split("\0")
+        if len(fields) < 4:
+            continue
+        sha, author, committed_at, message = fields[:4]
+        commits.append({
+            "sha": sha,
+            "author": None,
+            "commit": {
+                "message": message.strip(),
+                "author": {"name": author},
+                "committer": {"date": committed_at},
+            },
+        })
+    return commits
+
+
+def _languages(files):
+    totals = {}
+    for item in files:
+        language = _LANGUAGE_BY_EXTENSION.get(os.path.splitext(item["path"].lower())[1])
+        if language:
+            totals[language] = totals.get(language, 0) + item["size"]
+    return [language for language, _ in sorted(totals.items(), key=lambda pair: pair[1], reverse=True)[:5]]
+
+
+def _readme_entry(files):
+    readmes = [item for item in files if "/" not in item["path"] and item["path"].lower().startswith("readme")]
+    readmes.sort(key=lambda item: (not item["path"].lower().endswith(".md"), item["path"]))
+    return readmes[0] if readmes else None
+
+
+def analyze_local_repository(path, ref="HEAD", user=None, repo_url=None, progress=None):
+    # Same report as _analyze_repository_work, read straight from git objects:
+    # no GitHub calls, no quota, and deterministic for a given commit.
+    progress = progress or (lambda stage, **data: None)
+    name = os.path.splitext(os.path.basename(os.path.abspath(path).rstrip(os.sep)))[0]
+    try:
+        with open_local_repository(path) as git_dir:
+            branch = _git(git_dir, "rev-parse", "--abbrev-ref", ref).decode("utf-8").strip()
+            files = _list_tree(git_dir, ref)
+            selected_files = _select_repo_files_for_review(files)
+            if not selected_files:
+                return {"error": "No analyzable text files found for this repository."}
+            reused_reviews = _load_file_reviews(selected_files)
+            wanted = {
+                index: item["sha"]
+                for index, item in enumerate(selected_files)
+                if (item["sha"], item["path"]) not in reused_reviews
+            }
+            cached_blobs = _load_repo_blobs(list(wanted.values()))
+            readme = _readme_entry(files)
+            progress("fetching_files", files_done=0, files_total=len(selected_files))
+            texts = _read_blobs(
+                git_dir,
+                [sha for sha in wanted.values() if sha not in cached_blobs] + ([readme["sha"]] if readme else []),
+            )
+            texts.update({sha: content for sha, (_blob_id, content) in cached_blobs.items()})
+            fetched = {index: texts[sha] for index, sha in wanted.items() if sha in texts}
+            commits = _read_commits(git_dir, ref)
+            fetched.update(
+                languages=_languages(files),
+                commits=commits,
+                readme=texts.get(readme["sha"], "")[:4000] if readme else "",
+            )
+            repo_data = {
+                "name": name,
+                "html_url": repo_url,
+                "default_branch": branch if branch != "HEAD" else ref,
+                "pushed_at": commits[0]["commit"]["committer"]["date"] if commits else None,
+            }
+            return _build_repository_report(
+                repo_data,
+                files,
+                selected_files,
+                fetched,
+                reused_reviews=reused_reviews,
+                cached_blobs=cached_blobs,
+                missing=set(),
+                repo_url=repo_url or f"file://{os.path.abspath(path)}",
+                fallback_name=name,
+                load_content=lambda sha: texts.get(sha) or _read_blobs(git_dir, [sha]).get(sha),
+                user=user,
+                progress=progress,
+            )
+    except LocalRepositoryError as exc:
+        return {"error": str(exc)}
@@ -0,0 +1,77 @@
+from contextlib import contextmanager
+import json
+import os
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from skills.local_repo import analyze_local_repository
+
+
+@contextmanager
+def _environ(**values):
+    saved = {name: os.environ.get(name) for name in values}
+    os.environ.update(values)
+    try:
+        yield
+    finally:
+        for name, value in saved.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+
+class Command(BaseCommand):
+    help = "Analyze a local git repository or bundle without calling the GitHub API."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Working tree, bare repository, or git bundle file.")
+        parser.add_argument("--ref", default="HEAD", help="Commit, branch, or tag to analyze.")
+        parser.add_argument(
+            "--iterations",
+            type=int,
+            default=0,
+            help=(
+                "Time this many cold and this many warm analyses instead of printing the report. "
+                "LLM calls are off and nothing is left in the database."
+            ),
+        )
+
+    def _analyze(self, options):
+        result = analyze_local_repository(options["path"], ref=options["ref"])
+        if result.get("error"):
+            raise CommandError(result["error"])
+        return result
+
+    def _time(self, options, iterations):
+        timings = []
+        for _ in range(iterations):
+            started = time.perf_counter()
+            result = self._analyze(options)
+            timings.append(time.perf_counter() - started)
+        return result, timings
+
+    def handle(self, *args, **options):
+        if options["iterations"] <= 0:
+            self.stdout.write(json.dumps(self._analyze(options), indent=2, sort_keys=True))
+            return
+
+        # Cold runs skip the blob, review and fingerprint tables entirely, so
+        # they time the analysis itself. Warm runs read what one untimed run
+        # stored, and everything they wrote is rolled back at the end.
+        with _environ(OPENAI_API_KEY=""):
+            with _environ(AI_REPO_CACHE_ENABLED="false"):
+                result, cold = self._time(options, options["iterations"])
+            with _environ(AI_REPO_CACHE_ENABLED="true"), transaction.atomic():
+                self._analyze(options)
+                _result, warm = self._time(options, options["iterations"])
+                transaction.set_rollback(True)
+        self.stdout.write(
+            f"analyze_local_repo: {result['files_analyzed']} files {result['lines_analyzed']} lines, "
+            f"cold median {statistics.median(cold) * 1000:.1f} ms min {min(cold) * 1000:.1f} ms, "
+            f"warm median {statistics.median(warm) * 1000:.1f} ms min {min(warm) * 1000:.1f} ms "
+            f"over {len(cold)} runs each"
+        )
@@ -0,0 +1,69 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from skills.views import _heuristic_file_review
+
+_SAMPLES = {
+    "app/services.py": (
+        "import os\n"
+        "\n"
+        "class OrderService:\n"
+        "    \"\"\"Coordinates order persistence.\"\"\"\n"
+        "\n"
+        "    def create(self, payload):\n"
+        "        # validate before saving\n"
+        "        if not payload.get('items'):\n"
+        "            raise ValueError('items are required')\n"
+        "        total = sum(item['price'] * item['quantity'] for item in payload['items'])\n"
+        "        return {'total': total, 'currency': os.environ.get('CURRENCY', 'USD')}\n"
+        "\n"
+    ),
+    "src/components/Orders.tsx": (
+        "import { useEffect, useState } from 'react';\n"
+        "\n"
+        "export function Orders({ client }: { client: ApiClient }) {\n"
+        "  const [orders, setOrders] = useState<Order[]>([]);\n"
+        "  useEffect(() => {\n"
+        "    client.list().then(setOrders).catch((error) => console.log(error));\n"
+        "  }, [client]);\n"
+        "  // TODO: paginate\n"
+        "  return <OrderTable rows={orders} />;\n"
+        "}\n"
+        "\n"
+    ),
+}
+
+
+class Command(BaseCommand):
+    help = "Time _heuristic_file_review on large synthetic source files."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--size-kb",
+            type=int,
+            default=200,
+            help="Approximate size of each synthetic file.",
+        )
+        parser.add_argument(
+            "--iterations",
+            type=int,
+            default=20,
+            help="Reviews timed per file.",
+        )
+
+    def handle(self, *args, **options):
+        size = max(1, options["size_kb"]) * 1024
+        iterations = max(1, options["iterations"])
+        for path, block in _SAMPLES.items():
+            content = block * max(1, size // len(block))
+            _heuristic_file_review(path, content)
+            started = time.perf_counter()
+            for _ in range(iterations):
+                _heuristic_file_review(path, content)
+            elapsed = (time.perf_counter() - started) / iterations
+            megabytes = len(content) / (1024 * 1024)
+            self.stdout.write(
+                f"benchmark_file_review: {path} {len(content) // 1024} KB "
+                f"{elapsed * 1000:.2f} ms/file {megabytes / elapsed:.1f} MB/s"
+            )
@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand
+
+from skills.snapshot_retention import (
+    prune_repo_snapshots,
+    snapshot_history_depth,
+    snapshot_prune_batch_size,
+)
+
+
+class Command(BaseCommand):
+    help = "Delete old repository file snapshots and the blobs nothing references any more."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--history",
+            type=int,
+            default=snapshot_history_depth(),
+            help="Older versions kept per file in addition to the latest one and the ones reports reviewed.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=snapshot_prune_batch_size(),
+            help="Rows deleted per statement.",
+        )
+        parser.add_argument(
+            "--blob-grace-seconds",
+            type=int,
+            default=3600,
+            help="Leave snapshots and unreferenced blobs younger than this for in-flight analyses.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report what would be deleted.",
+        )
+
+    def handle(self, *args, **options):
+        result = prune_repo_snapshots(
+            history=options["history"],
+            batch_size=max(1, options["batch_size"]),
+            blob_grace_seconds=options["blob_grace_seconds"],
+            dry_run=options["dry_run"],
+        )
+        verb = "would delete" if options["dry_run"] else "deleted"
+        self.stdout.write(
+            f"prune_repo_snapshots: {verb} {result['snapshots']} snapshots, "
+            f"{result['blobs']} blobs, {result['reviews']} cached reviews, "
+            f"{result['fingerprints']} fingerprints"
+        )
@@ -0,0 +1,59 @@
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, connection
+from django.db.models import Count, Sum
+from django.db.models.functions import Length
+
+from skills.models import RepoBlob, RepoFileReview, RepoFileSnapshot
+
+
+def _table_bytes(table):
+    # Actual on-disk size including indexes where the backend can tell us;
+    # SQLite only exposes it when compiled with the dbstat virtual table.
+    try:
+        with connection.cursor() as cursor:
+            if connection.vendor == "postgresql":
+                cursor.execute("SELECT pg_total_relation_size(%s)", [table])
+            elif connection.vendor == "sqlite":
+                cursor.execute("SELECT SUM(pgsize) FROM dbstat WHERE name = %s", [table])
+            else:
+                return None
+            row = cursor.fetchone()
+    except DatabaseError:
+        return None
+    return row[0] if row and row[0] is not None else None
+
+
+def _format_bytes(value):
+    if value is None:
+        return "n/a"
+    for unit in ("B", "KB", "MB", "GB"):
+        if value < 1024 or unit == "GB":
+            return f"{value:.1f} {unit}" if unit != "B" else f"{value} B"
+        value /= 1024
+
+
+class Command(BaseCommand):
+    help = "Report how much space repository snapshots and their compressed blobs use."
+
+    def handle(self, *args, **options):
+        blobs = RepoBlob.objects.aggregate(
+            count=Count("id"),
+            raw=Sum("size"),
+            stored=Sum(Length("data")),
+        )
+        snapshots = RepoFileSnapshot.objects.aggregate(count=Count("id"), raw=Sum("size"))
+        raw = blobs["raw"] or 0
+        stored = blobs["stored"] or 0
+        # Before blobs, every snapshot row carried its own copy of the text.
+        inline = snapshots["raw"] or 0
+
+        self.stdout.write(f"repo_storage_report: snapshots {snapshots['count']} rows, blobs {blobs['count']} rows")
+        self.stdout.write(f"repo_storage_report: inline text (before) {_format_bytes(inline)}")
+        self.stdout.write(
+            f"repo_storage_report: unique text {_format_bytes(raw)}, compressed (after) {_format_bytes(stored)}"
+        )
+        if stored:
+            self.stdout.write(f"repo_storage_report: reduction {inline / stored:.1f}x vs inline text")
+        for model in (RepoFileSnapshot, RepoBlob, RepoFileReview):
+            table = model._meta.db_table
+            self.stdout.write(f"repo_storage_report: table {table} {_format_bytes(_table_bytes(table))}")
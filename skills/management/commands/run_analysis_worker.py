@@ -0,0 +1,127 @@
+import logging
+import os
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from skills.analysis_jobs import claim_next_job, mark_job_failed, requeue_stale_code_analysis_jobs
+from skills.snapshot_retention import prune_repo_snapshots, snapshot_prune_interval
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Run queued code-analysis reports and AI-generated scans with a pool of database-backed workers."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=int(os.environ.get("CODE_ANALYSIS_WORKERS", "2") or 2),
+            help="Number of analyses processed in parallel.",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=2.0,
+            help="Seconds to wait before polling again when the queue is empty.",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Drain the queue and exit instead of polling forever.",
+        )
+        parser.add_argument(
+            "--prune-interval",
+            type=int,
+            default=snapshot_prune_interval(),
+            help="Seconds between snapshot retention passes; 0 disables them.",
+        )
+
+    def handle(self, *args, **options):
+        concurrency = max(1, options["concurrency"])
+        poll_interval = max(0.1, options["poll_interval"])
+        once = options["once"]
+        prune_interval = max(0, options["prune_interval"])
+        stop = threading.Event()
+        last_sweep = [0.0]
+        last_prune = [time.monotonic()]
+        prune_lock = threading.Lock()
+
+        def prune():
+            # Only one idle worker prunes at a time, and never right at startup
+            # so a crash loop cannot turn into a delete loop.
+            if not prune_interval or time.monotonic() - last_prune[0] < prune_interval:
+                return
+            if not prune_lock.acquire(blocking=False):
+                return
+            try:
+                last_prune[0] = time.monotonic()
+                result = prune_repo_snapshots()
+                self.stdout.write(
+                    f"run_analysis_worker: pruned {result['snapshots']} snapshots, {result['blobs']} blobs"
+                )
+            finally:
+                prune_lock.release()
+
+        def sweep():
+            # Jobs left running by a crashed worker are requeued (or failed once
+            # they run out of attempts); idle workers check about once a minute.
+            if time.monotonic() - last_sweep[0] < 60:
+                return
+            last_sweep[0] = time.monotonic()
+            recovered = requeue_stale_code_analysis_jobs()
+            if recovered:
+                self.stdout.write(f"run_analysis_worker: recovered {recovered} stale jobs")
+
+        def work():
+            while not stop.is_set():
+                claimed = claim_next_job()
+                if claimed is None:
+                    if once:
+                        return
+                    sweep()
+                    prune()
+                    close_old_connections()
+                    stop.wait(poll_interval)
+                    continue
+                kind, job, run = claimed
+                started = time.monotonic()
+                try:
+                    status = run(job)
+                except Exception as exc:
+                    # A job that raises must not take its worker thread with
+                    # it; if even the failure cannot be recorded, the stale
+                    # sweep requeues the job later.
+                    logger.exception("run_analysis_worker: %s %s raised", kind, job.id)
+                    status = "failed"
+                    try:
+                        mark_job_failed(job, str(exc) or type(exc).__name__)
+                    except Exception:
+                        logger.exception("run_analysis_worker: could not mark %s %s failed", kind, job.id)
+                close_old_connections()
+                self.stdout.write(
+                    f"run_analysis_worker: {kind} {job.id} {status} in {time.monotonic() - started:.2f}s"
+                )
+
+        sweep()
+        if concurrency == 1:
+            work()
+            return
+
+        threads = [
+            threading.Thread(target=work, name=f"analysis-worker-{index}", daemon=True)
+            for index in range(concurrency)
+        ]
+        for thread in threads:
+            thread.start()
+        try:
+            for thread in threads:
+                while thread.is_alive():
+                    thread.join(timeout=1.0)
+        except KeyboardInterrupt:
+            stop.set()
+            for thread in threads:
+                thread.join()
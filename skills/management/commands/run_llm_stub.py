@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand
+
+from skills.llm_stub import LLMStubServer
+
+
+class Command(BaseCommand):
+    help = "Serve a deterministic OpenAI-compatible chat-completions stub for tests and load benchmarks."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=8765)
+        parser.add_argument(
+            "--latency-ms",
+            type=int,
+            default=0,
+            help="Delay added to every reply.",
+        )
+        parser.add_argument(
+            "--fail-every",
+            type=int,
+            default=0,
+            help="Answer every Nth request with --fail-status; 0 never fails.",
+        )
+        parser.add_argument(
+            "--fail-status",
+            type=int,
+            default=503,
+            help="HTTP status used for injected failures.",
+        )
+
+    def handle(self, *args, **options):
+        server = LLMStubServer(
+            (options["host"], options["port"]),
+            latency=options["latency_ms"] / 1000,
+            fail_every=options["fail_every"],
+            fail_status=options["fail_status"],
+        )
+        self.stdout.write(f"run_llm_stub: serving {server.url}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
@@ -0,0 +1,23 @@
+# Generated by Django 4.2 on 2026-10-19 06:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('skills', '0013_aiinterviewsession_session_profile_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='scorecard',
+            name='formula_version',
+            field=models.IntegerField(default=0, help_text='Scoring formula version that produced this score'),
+        ),
+        migrations.AddField(
+            model_name='scoresnapshot',
+            name='formula_version',
+            field=models.IntegerField(default=0, help_text='Scoring formula version that produced these scores'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 4.2 on 2026-10-19 06:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('skills', '0014_scorecard_formula_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GitHubResponseCache',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cache_key', models.CharField(max_length=64, unique=True)),
+                ('url', models.TextField()),
+                ('accept', models.CharField(blank=True, max_length=100)),
+                ('etag', models.CharField(blank=True, max_length=255)),
+                ('last_modified', models.CharField(blank=True, max_length=64)),
+                ('body', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'GitHub Response Cache',
+                'verbose_name_plural': 'GitHub Response Cache',
+                'ordering': ['-updated_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 4.2 on 2026-10-19 06:59
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('skills', '0015_githubresponsecache'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GitHubRepository',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('owner_login', models.CharField(max_length=100)),
+                ('repo_id', models.BigIntegerField()),
+                ('name', models.CharField(max_length=200)),
+                ('html_url', models.URLField()),
+                ('language', models.CharField(blank=True, max_length=100)),
+                ('fork', models.BooleanField(default=False)),
+                ('is_template', models.BooleanField(default=False)),
+                ('stargazers_count', models.IntegerField(default=0)),
+                ('forks_count', models.IntegerField(default=0)),
+                ('pushed_at', models.DateTimeField(blank=True, null=True)),
+                ('github_updated_at', models.DateTimeField(blank=True, null=True)),
+                ('synced_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'verbose_name': 'GitHub Repository',
+                'verbose_name_plural': 'GitHub Repositories',
+                'ordering': ['-github_updated_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='githubresponsecache',
+            name='link',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddIndex(
+            model_name='githubrepository',
+            index=models.Index(fields=['owner_login', 'pushed_at'], name='skills_gith_owner_l_079c7d_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='githubrepository',
+            unique_together={('owner_login', 'repo_id')},
+        ),
+    ]
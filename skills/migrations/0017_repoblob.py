@@ -0,0 +1,39 @@
+# Generated by Django 4.2 on 2026-10-19 07:03
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('skills', '0016_githubrepository'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RepoBlob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sha', models.CharField(max_length=64, unique=True)),
+                ('data', models.BinaryField()),
+                ('size', models.IntegerField(default=0)),
+                ('lines', models.IntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Repo Blob',
+                'verbose_name_plural': 'Repo Blobs',
+            },
+        ),
+        migrations.AlterField(
+            model_name='repofilesnapshot',
+            name='content',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.AddField(
+            model_name='repofilesnapshot',
+            name='blob',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='snapshots', to='skills.repoblob'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 4.2 on 2026-10-19 07:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('skills', '0018_codeanalysisreport_progress'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RepoFileReview',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sha', models.CharField(max_length=64)),
+                ('path', models.TextField()),
+                ('review_version', models.IntegerField(default=1)),
+                ('review', models.JSONField(default=dict)),
+                ('lines', models.IntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Repo File Review',
+                'verbose_name_plural': 'Repo File Reviews',
+                'unique_together': {('sha', 'path', 'review_version')},
+            },
+        ),
+    ]
@@ -0,0 +1,62 @@
+import hashlib
+import zlib
+
+from django.db import migrations
+
+BATCH_SIZE = 500
+
+
+def compress_snapshot_content(apps, schema_editor):
+    # Snapshots written before the blob store kept (possibly truncated) text
+    # inline. Each one moves into a compressed blob addressed by the git SHA of
+    # the text actually stored, so a truncated copy can never stand in for the
+    # full file under its real SHA.
+    RepoBlob = apps.get_model('skills', 'RepoBlob')
+    RepoFileSnapshot = apps.get_model('skills', 'RepoFileSnapshot')
+    pending = RepoFileSnapshot.objects.filter(blob__isnull=True).exclude(content='').order_by('pk')
+    last_pk = 0
+    while True:
+        batch = list(pending.filter(pk__gt=last_pk).only('pk', 'content')[:BATCH_SIZE])
+        if not batch:
+            break
+        last_pk = batch[-1].pk
+        keys = {}
+        for snapshot in batch:
+            data = snapshot.content.encode('utf-8')
+            keys[snapshot.pk] = hashlib.sha1(b'blob %d\0' % len(data) + data).hexdigest()
+        texts = {keys[snapshot.pk]: snapshot.content for snapshot in batch}
+        RepoBlob.objects.bulk_create(
+            [
+                RepoBlob(
+                    sha=sha,
+                    data=zlib.compress(text.encode('utf-8')),
+                    size=len(text),
+                    lines=text.count('\n') + 1 if text else 0,
+                )
+                for sha, text in texts.items()
+            ],
+            ignore_conflicts=True,
+        )
+        blob_ids = dict(RepoBlob.objects.filter(sha__in=list(texts)).values_list('sha', 'id'))
+        for snapshot in batch:
+            snapshot.blob_id = blob_ids[keys[snapshot.pk]]
+            snapshot.content = ''
+        RepoFileSnapshot.objects.bulk_update(batch, ['blob', 'content'])
+
+
+def restore_snapshot_content(apps, schema_editor):
+    RepoFileSnapshot = apps.get_model('skills', 'RepoFileSnapshot')
+    snapshots = RepoFileSnapshot.objects.filter(blob__isnull=False, content='').select_related('blob')
+    for snapshot in snapshots.iterator(chunk_size=BATCH_SIZE):
+        snapshot.content = zlib.decompress(bytes(snapshot.blob.data)).decode('utf-8')
+        snapshot.save(update_fields=['content'])
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('skills', '0019_repofilereview'),
+    ]
+
+    operations = [
+        migrations.RunPython(compress_snapshot_content, restore_snapshot_content),
+    ]
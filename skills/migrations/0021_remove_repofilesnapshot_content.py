@@ -0,0 +1,17 @@
+# Generated by Django 4.2 on 2026-10-19 07:19
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('skills', '0020_compress_snapshot_content'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='repofilesnapshot',
+            name='content',
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2 on 2026-10-19 07:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('skills', '0021_remove_repofilesnapshot_content'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='repoblob',
+            name='line_index',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 4.2 on 2026-10-19 07:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('skills', '0022_repoblob_line_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RepoFingerprint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sha', models.CharField(max_length=64)),
+                ('hash', models.BigIntegerField(db_index=True)),
+            ],
+            options={
+                'verbose_name': 'Repo Fingerprint',
+                'verbose_name_plural': 'Repo Fingerprints',
+                'unique_together': {('sha', 'hash')},
+            },
+        ),
+    ]
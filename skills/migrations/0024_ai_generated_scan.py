@@ -0,0 +1,64 @@
+# Generated by Django 4.2 on 2026-10-19 07:35
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('skills', '0023_repofingerprint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AIGeneratedScanJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('completed', 'Completed'), ('failed', 'Failed')], default='queued', max_length=20)),
+                ('progress', models.JSONField(blank=True, default=dict)),
+                ('error', models.TextField(blank=True)),
+                ('attempts', models.IntegerField(default=0)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ai_generated_scan_jobs', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'AI-Generated Scan Job',
+                'verbose_name_plural': 'AI-Generated Scan Jobs',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='AIGeneratedRepoResult',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('repo_id', models.BigIntegerField()),
+                ('repo_name', models.CharField(max_length=200)),
+                ('repo_url', models.URLField(blank=True)),
+                ('pushed_at', models.DateTimeField(blank=True, null=True)),
+                ('status', models.CharField(choices=[('completed', 'Completed'), ('failed', 'Failed')], default='completed', max_length=20)),
+                ('result', models.JSONField(blank=True, default=dict)),
+                ('error', models.TextField(blank=True)),
+                ('analyzed_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ai_generated_repo_results', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'AI-Generated Repo Result',
+                'verbose_name_plural': 'AI-Generated Repo Results',
+                'ordering': ['-pushed_at'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='aigeneratedscanjob',
+            index=models.Index(fields=['status', 'created_at'], name='skills_aige_status_d62005_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='aigeneratedreporesult',
+            unique_together={('user', 'repo_id')},
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2 on 2026-10-19 08:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('skills', '0025_llmresponsecache'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='githubresponsecache',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+    ]
@@ -1,5 +1,6 @@
 from django.db import models
 from django.contrib.auth import get_user_model
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
 User = get_user_model()
@@ -72,6 +73,7 @@ class ScoreCard(models.Model):
     score_type = models.CharField(max_length=30, choices=SCORE_TYPES)
     score = models.IntegerField(default=0, help_text='Score out of 100')
     change = models.IntegerField(default=0, help_text='Change from previous score')
+    formula_version = models.IntegerField(default=0, help_text='Scoring formula version that produced this score')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -88,6 +90,7 @@ class ScoreSnapshot(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='score_snapshots')
     recorded_on = models.DateField()
     scores = models.JSONField(default=dict)
+    formula_version = models.IntegerField(default=0, help_text='Scoring formula version that produced these scores')
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
@@ -216,6 +219,7 @@ class ProjectSubmission(models.Model):
 class CodeAnalysisReport(models.Model):
     STATUS_CHOICES = [
         ('queued', 'Queued'),
+        ('running', 'Running'),
         ('completed', 'Completed'),
         ('failed', 'Failed'),
     ]
@@ -226,23 +230,132 @@ class CodeAnalysisReport(models.Model):
     score = models.IntegerField(default=0)
     metrics = models.JSONField(default=dict)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    progress = models.JSONField(default=dict, blank=True)
+    error = models.TextField(blank=True)
+    attempts = models.IntegerField(default=0)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         ordering = ['-created_at']
         verbose_name = _('Code Analysis Report')
         verbose_name_plural = _('Code Analysis Reports')
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {self.repo_url}"
 
 
+class AIGeneratedScanJob(models.Model):
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='ai_generated_scan_jobs')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    progress = models.JSONField(default=dict, blank=True)
+    error = models.TextField(blank=True)
+    attempts = models.IntegerField(default=0)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = _('AI-Generated Scan Job')
+        verbose_name_plural = _('AI-Generated Scan Jobs')
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} - {self.status}"
+
+
+class AIGeneratedRepoResult(models.Model):
+    STATUS_CHOICES = [
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='ai_generated_repo_results')
+    repo_id = models.BigIntegerField()
+    repo_name = models.CharField(max_length=200)
+    repo_url = models.URLField(blank=True)
+    pushed_at = models.DateTimeField(null=True, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='completed')
+    result = models.JSONField(default=dict, blank=True)
+    error = models.TextField(blank=True)
+    analyzed_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ['-pushed_at']
+        verbose_name = _('AI-Generated Repo Result')
+        verbose_name_plural = _('AI-Generated Repo Results')
+        unique_together = ['user', 'repo_id']
+
+    def __str__(self):
+        return f"{self.user.username} - {self.repo_name}"
+
+
+class RepoBlob(models.Model):
+    sha = models.CharField(max_length=64, unique=True)
+    data = models.BinaryField()
+    size = models.IntegerField(default=0)
+    lines = models.IntegerField(default=0)
+    line_index = models.JSONField(default=dict, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = _('Repo Blob')
+        verbose_name_plural = _('Repo Blobs')
+
+    def __str__(self):
+        return self.sha
+
+
+class RepoFileReview(models.Model):
+    sha = models.CharField(max_length=64)
+    path = models.TextField()
+    review_version = models.IntegerField(default=1)
+    review = models.JSONField(default=dict)
+    lines = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = _('Repo File Review')
+        verbose_name_plural = _('Repo File Reviews')
+        unique_together = ['sha', 'path', 'review_version']
+
+    def __str__(self):
+        return f"{self.path} @ {self.sha[:7]}"
+
+
+class RepoFingerprint(models.Model):
+    sha = models.CharField(max_length=64)
+    hash = models.BigIntegerField(db_index=True)
+
+    class Meta:
+        verbose_name = _('Repo Fingerprint')
+        verbose_name_plural = _('Repo Fingerprints')
+        unique_together = ['sha', 'hash']
+
+    def __str__(self):
+        return f"{self.sha}:{self.hash}"
+
+
 class RepoFileSnapshot(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='repo_file_snapshots')
     repo_url = models.URLField()
     path = models.TextField()
     sha = models.CharField(max_length=64)
-    content = models.TextField()
+    blob = models.ForeignKey(RepoBlob, on_delete=models.CASCADE, null=True, blank=True, related_name='snapshots')
     size = models.IntegerField(default=0)
     lines = models.IntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
@@ -261,6 +374,70 @@ class RepoFileSnapshot(models.Model):
         return f"{self.user.username} - {self.path}"
 
 
+class GitHubResponseCache(models.Model):
+    cache_key = models.CharField(max_length=64, unique=True)
+    url = models.TextField()
+    accept = models.CharField(max_length=100, blank=True)
+    etag = models.CharField(max_length=255, blank=True)
+    last_modified = models.CharField(max_length=64, blank=True)
+    link = models.TextField(blank=True)
+    body = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    class Meta:
+        ordering = ['-updated_at']
+        verbose_name = _('GitHub Response Cache')
+        verbose_name_plural = _('GitHub Response Cache')
+
+    def __str__(self):
+        return self.url
+
+
+class LLMResponseCache(models.Model):
+    cache_key = models.CharField(max_length=64, unique=True)
+    kind = models.CharField(max_length=40, blank=True)
+    response = models.JSONField(default=dict)
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_used_at = models.DateTimeField(default=timezone.now, db_index=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        ordering = ['-last_used_at']
+        verbose_name = _('LLM Response Cache')
+        verbose_name_plural = _('LLM Response Cache')
+
+    def __str__(self):
+        return f"{self.kind}:{self.cache_key}"
+
+
+class GitHubRepository(models.Model):
+    owner_login = models.CharField(max_length=100)
+    repo_id = models.BigIntegerField()
+    name = models.CharField(max_length=200)
+    html_url = models.URLField()
+    language = models.CharField(max_length=100, blank=True)
+    fork = models.BooleanField(default=False)
+    is_template = models.BooleanField(default=False)
+    stargazers_count = models.IntegerField(default=0)
+    forks_count = models.IntegerField(default=0)
+    pushed_at = models.DateTimeField(null=True, blank=True)
+    github_updated_at = models.DateTimeField(null=True, blank=True)
+    synced_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ['-github_updated_at']
+        verbose_name = _('GitHub Repository')
+        verbose_name_plural = _('GitHub Repositories')
+        unique_together = ['owner_login', 'repo_id']
+        indexes = [
+            models.Index(fields=['owner_login', 'pushed_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.owner_login}/{self.name}"
+
+
 class MediaUpload(models.Model):
     MEDIA_TYPES = [
         ('video', 'Video'),
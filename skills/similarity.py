@@ -0,0 +1,190 @@
+from collections import deque
+import os
+import re
+import zlib
+
+from django.db.models import Count
+
+from .models import RepoFileSnapshot, RepoFingerprint
+
+# Winnowing (Schleimer, Wilkerson & Aiken): hash every k-gram of normalized
+# tokens and keep the minimum hash of each window of w consecutive k-grams.
+# Any shared run of at least k + w - 1 tokens is guaranteed to produce a
+# shared fingerprint, while unrelated files rarely do.
+_KGRAM = 12
+_WINDOW = 8
+_MODULUS = (1 << 61) - 1
+_BASE = 1_000_003
+_BASE_POWER = pow(_BASE, _KGRAM - 1, _MODULUS)
+_QUERY_CHUNK = 500
+
+_COMMENT_PATTERN = re.compile(r"/\*.*?\*/|(?<![:\w])//[^\n]*|#[^\n]*", re.S)
+_TOKEN_PATTERN = re.compile(r"\"(?:\\.|[^\"\\\n])*\"|'(?:\\.|[^'\\\n])*'|[A-Za-z_]\w*|\d[\w.]*|\S")
+_GITHUB_REPO_PATTERN = re.compile(r"github\.com[/:]([^/\s]+)/([^/\s?#]+)", re.I)
+_KEYWORDS = frozenset(
+    "and as async await break case catch class const continue def default del do elif else except export "
+    "extends finally for from function if import in interface is lambda let new not or pass raise return "
+    "static switch this self throw try type var while with yield".split()
+)
+
+
+def _env_int(name, default):
+    try:
+        return int(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def strip_comments(content):
+    return _COMMENT_PATTERN.sub(" ", content)
+
+
+def _normalized_tokens(content):
+    # Renaming variables, reformatting, or editing comments and literals must
+    # not change the fingerprint, so identifiers, numbers and strings collapse
+    # to placeholders and only keywords and punctuation keep their text.
+    tokens = []
+    for token in _TOKEN_PATTERN.findall(strip_comments(content)):
+        first = token[0]
+        if first in "\"'":
+            tokens.append("S")
+        elif first.isdigit():
+            tokens.append("N")
+        elif first.isalpha() or first == "_":
+            tokens.append(token if token in _KEYWORDS else "V")
+        else:
+            tokens.append(token)
+    return tokens
+
+
+def code_fingerprints(content):
+    tokens = [zlib.crc32(token.encode("utf-8")) for token in _normalized_tokens(content or "")]
+    if len(tokens) < _KGRAM:
+        return set()
+    # Rolling polynomial hash over the token stream; crc32 keeps token values
+    # stable across processes, unlike the built-in hash().
+    hashes = []
+    value = 0
+    for index, token in enumerate(tokens):
+        if index >= _KGRAM:
+            value = (value - tokens[index - _KGRAM] * _BASE_POWER) % _MODULUS
+        value = (value * _BASE + token) % _MODULUS
+        if index >= _KGRAM - 1:
+            hashes.append(value)
+    if len(hashes) <= _WINDOW:
+        return {min(hashes)}
+    # Monotonic deque gives each window's rightmost minimum in O(n).
+    fingerprints = set()
+    window = deque()
+    for index, value in enumerate(hashes):
+        while window and hashes[window[-1]] >= value:
+            window.pop()
+        window.append(index)
+        if window[0] <= index - _WINDOW:
+            window.popleft()
+        if index >= _WINDOW - 1:
+            fingerprints.add(hashes[window[0]])
+    return fingerprints
+
+
+def _repo_identity(repo_url):
+    # github.com/Owner/Name, .../name.git and .../name/ are one repository.
+    url = (repo_url or "").strip()
+    match = _GITHUB_REPO_PATTERN.search(url)
+    if not match:
+        return url.rstrip("/").lower()
+    name = match.group(2)
+    if name.lower().endswith(".git"):
+        name = name[:-4]
+    return f"{match.group(1)}/{name}".lower()
+
+
+def _chunks(values, size=_QUERY_CHUNK):
+    values = list(values)
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+def index_file_fingerprints(contents):
+    # `contents` maps blob SHA to text. Fingerprints are keyed by blob, so a
+    # file shared by many students is indexed once.
+    if not contents:
+        return 0
+    indexed = set()
+    for chunk in _chunks(contents):
+        indexed.update(RepoFingerprint.objects.filter(sha__in=chunk).values_list("sha", flat=True).distinct())
+    rows = [
+        RepoFingerprint(sha=sha, hash=value)
+        for sha, content in contents.items()
+        if sha not in indexed
+        for value in code_fingerprints(content)
+    ]
+    RepoFingerprint.objects.bulk_create(rows, batch_size=1000, ignore_conflicts=True)
+    return len(rows)
+
+
+def unindexed_shas(shas):
+    shas = set(shas)
+    for chunk in _chunks(shas):
+        shas.difference_update(RepoFingerprint.objects.filter(sha__in=chunk).values_list("sha", flat=True))
+    return shas
+
+
+def find_similar_repositories(user, shas, repo_url=None, limit=5):
+    # Lookup cost scales with this repository's fingerprints and their posting
+    # lists, not with how many students are indexed. Fingerprints that appear
+    # in too many blobs are boilerplate (generated settings, license headers)
+    # and are ignored. Other students' analyses of the same repository are not
+    # matches, and results never say which student a repository belongs to.
+    max_postings = max(2, _env_int("AI_SIMILARITY_MAX_POSTINGS", 50))
+    own_hashes = set()
+    for chunk in _chunks(set(shas)):
+        own_hashes.update(RepoFingerprint.objects.filter(sha__in=chunk).values_list("hash", flat=True))
+    if not own_hashes:
+        return []
+
+    postings = {}
+    boilerplate = set()
+    for chunk in _chunks(own_hashes):
+        common = {
+            row["hash"]
+            for row in RepoFingerprint.objects.filter(hash__in=chunk)
+            .values("hash")
+            .annotate(blobs=Count("sha"))
+            .filter(blobs__gt=max_postings)
+        }
+        boilerplate.update(common)
+        for sha, value in RepoFingerprint.objects.filter(hash__in=[h for h in chunk if h not in common]).values_list("sha", "hash"):
+            postings.setdefault(sha, set()).add(value)
+    distinctive = len(own_hashes) - len(boilerplate)
+    if not postings or not distinctive:
+        return []
+
+    own_repo = _repo_identity(repo_url) if repo_url else None
+    matches = {}
+    for chunk in _chunks(postings):
+        snapshots = (
+            RepoFileSnapshot.objects.filter(sha__in=chunk)
+            .exclude(user=user)
+            .values_list("repo_url", "path", "sha")
+            .distinct()
+        )
+        for other_url, path, sha in snapshots:
+            identity = _repo_identity(other_url)
+            if identity == own_repo:
+                continue
+            match = matches.setdefault(identity, {"repo_url": other_url, "hashes": set(), "paths": set()})
+            match["hashes"].update(postings[sha])
+            match["paths"].add(path)
+
+    results = [
+        {
+            "repo_url": match["repo_url"],
+            "overlap": round(len(match["hashes"]) / distinctive, 3),
+            "matched_files": len(match["paths"]),
+            "paths": sorted(match["paths"])[:5],
+        }
+        for match in matches.values()
+    ]
+    results.sort(key=lambda item: (-item["overlap"], -item["matched_files"], item["repo_url"]))
+    return results[:limit]
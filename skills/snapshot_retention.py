@@ -0,0 +1,125 @@
+from datetime import timedelta
+import os
+
+from django.db.models import F, Q, Window
+from django.db.models.functions import RowNumber
+from django.utils import timezone
+
+from .models import CodeAnalysisReport, RepoBlob, RepoFileReview, RepoFileSnapshot, RepoFingerprint
+from .views import FILE_REVIEW_VERSION
+
+
+def _env_int(name, default):
+    try:
+        return int(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def snapshot_history_depth():
+    return max(0, _env_int("REPO_SNAPSHOT_HISTORY", 2))
+
+
+def snapshot_prune_batch_size():
+    return min(max(_env_int("REPO_SNAPSHOT_PRUNE_BATCH", 500), 50), 5000)
+
+
+def snapshot_prune_interval():
+    # 0 disables the periodic prune in the worker; the command still works.
+    return max(0, _env_int("REPO_SNAPSHOT_PRUNE_INTERVAL_SECONDS", 0))
+
+
+def _delete_in_batches(queryset, ids, batch_size):
+    deleted = 0
+    for start in range(0, len(ids), batch_size):
+        _, per_model = queryset.filter(id__in=ids[start:start + batch_size]).delete()
+        deleted += per_model.get(queryset.model._meta.label, 0)
+    return deleted
+
+
+def _orphan_blobs(grace_seconds):
+    # Blobs are written before the snapshots that reference them, so a fresh
+    # unreferenced blob may belong to an analysis that is still running.
+    cutoff = timezone.now() - timedelta(seconds=max(0, grace_seconds))
+    return RepoBlob.objects.filter(created_at__lt=cutoff, snapshots__isnull=True)
+
+
+def _orphan_fingerprints():
+    return RepoFingerprint.objects.exclude(sha__in=RepoBlob.objects.values("sha"))
+
+
+def _orphan_reviews():
+    # Cached reviews are only reused while their blob exists and their version
+    # is current; anything else can never be served again.
+    return RepoFileReview.objects.filter(
+        Q(review_version__lt=FILE_REVIEW_VERSION) | ~Q(sha__in=RepoBlob.objects.values("sha"))
+    )
+
+
+def _report_references(batch_size):
+    # Each report lists every file it reviewed with the blob sha it read.
+    # Reports written before that list existed only name their ranked file
+    # reviews; the per-path history covers the rest of their files.
+    referenced = set()
+    report_ids = list(CodeAnalysisReport.objects.filter(status="completed").values_list("id", flat=True))
+    for start in range(0, len(report_ids), batch_size):
+        rows = CodeAnalysisReport.objects.filter(id__in=report_ids[start:start + batch_size])
+        for user_id, repo_url, metrics in rows.values_list("user_id", "repo_url", "metrics"):
+            metrics = metrics if isinstance(metrics, dict) else {}
+            files = metrics.get("reviewed_files") or [
+                (review.get("path"), review.get("sha"))
+                for review in metrics.get("file_reviews") or []
+                if isinstance(review, dict)
+            ]
+            for entry in files:
+                if isinstance(entry, (list, tuple)) and len(entry) == 2 and all(entry):
+                    referenced.add((user_id, repo_url, entry[0], entry[1]))
+    return referenced
+
+
+def prune_repo_snapshots(history=None, batch_size=None, blob_grace_seconds=3600, dry_run=False):
+    # Per (user, repo, path), the newest snapshot plus `history` older
+    # versions are kept, and so is any version a completed report reviewed,
+    # which the file preview serves. Repositories with an analysis in flight
+    # and rows younger than the grace period are left alone. Deletes go by
+    # primary key in small batches so no statement holds the table for long.
+    history = snapshot_history_depth() if history is None else max(0, history)
+    batch_size = batch_size or snapshot_prune_batch_size()
+    referenced = _report_references(batch_size)
+    active = set(
+        CodeAnalysisReport.objects.filter(status__in=["queued", "running"]).values_list("user_id", "repo_url")
+    )
+    cutoff = timezone.now() - timedelta(seconds=max(0, blob_grace_seconds))
+    ranked = RepoFileSnapshot.objects.annotate(
+        version=Window(
+            RowNumber(),
+            partition_by=[F("user_id"), F("repo_url"), F("path")],
+            order_by=[F("created_at").desc(), F("id").desc()],
+        )
+    ).values_list("id", "user_id", "repo_url", "path", "sha", "created_at", "version")
+    snapshot_ids = [
+        snapshot_id
+        for snapshot_id, user_id, repo_url, path, sha, created_at, version in ranked.iterator()
+        if version > history + 1
+        and created_at < cutoff
+        and (user_id, repo_url) not in active
+        and (user_id, repo_url, path, sha) not in referenced
+    ]
+
+    if dry_run:
+        return {
+            "snapshots": len(snapshot_ids),
+            "blobs": _orphan_blobs(blob_grace_seconds).count(),
+            "reviews": _orphan_reviews().count(),
+            "fingerprints": _orphan_fingerprints().count(),
+        }
+    snapshots = _delete_in_batches(RepoFileSnapshot.objects.all(), snapshot_ids, batch_size)
+    blob_ids = list(_orphan_blobs(blob_grace_seconds).values_list("id", flat=True))
+    # Re-check the reference inside the delete so a blob picked up again by a
+    # concurrent analysis does not cascade into its new snapshot.
+    blobs = _delete_in_batches(RepoBlob.objects.filter(snapshots__isnull=True), blob_ids, batch_size)
+    review_ids = list(_orphan_reviews().values_list("id", flat=True))
+    reviews = _delete_in_batches(RepoFileReview.objects.all(), review_ids, batch_size)
+    fingerprint_ids = list(_orphan_fingerprints().values_list("id", flat=True))
+    fingerprints = _delete_in_batches(RepoFingerprint.objects.all(), fingerprint_ids, batch_size)
+    return {"snapshots": snapshots, "blobs": blobs, "reviews": reviews, "fingerprints": fingerprints}
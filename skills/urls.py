@@ -29,10 +29,12 @@ urlpatterns = [
     path('university-dashboard/interventions/<int:student_id>/', views.university_intervention_view, name='university-intervention'),
     path('university-dashboard/drives/', views.university_placement_drives_view, name='university-placement-drives'),
     path('code-analysis/', views.code_analysis_view, name='skills-code-analysis'),
+    path('code-analysis/<int:report_id>/', views.code_analysis_detail_view, name='skills-code-analysis-detail'),
     path('code-analysis/<int:report_id>/file/', views.code_analysis_file_view, name='skills-code-analysis-file'),
     path('media/', views.media_view, name='skills-media'),
     path('progress/', views.progress_view, name='skills-progress'),
     path('roadmap/', views.roadmap_view, name='skills-roadmap'),
     path('settings/', views.settings_view, name='skills-settings'),
     path('performance/', views.performance_view, name='skills-performance'),
+    path('ops/metrics/', views.ops_metrics_view, name='skills-ops-metrics'),
 ]
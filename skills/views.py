@@ -1,25 +1,32 @@
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from datetime import timedelta
+import ast
+import contextvars
+import copy
 import csv
+import hashlib
 import io
 import math
 import json
 import os
 import base64
 import re
+import tarfile
 import textwrap
-import urllib.request
-import urllib.error
+import time
+import zlib
 from urllib.parse import urlparse
 import random
-from django.db import transaction
+from django.db import close_old_connections, transaction
 from django.db.models import Avg, Count
 from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import IsAuthenticated, AllowAny
+from rest_framework.permissions import IsAdminUser, IsAuthenticated, AllowAny
 from rest_framework.response import Response
 from django.utils import timezone
 from django.http import FileResponse, HttpResponse
 
 from .models import (
+    AIGeneratedScanJob,
     Skill,
     Activity,
     ScoreCard,
@@ -36,10 +43,18 @@ from .models import (
     RecruiterCandidatePipeline,
     RecruiterJob,
     RecruiterSavedSearch,
+    RepoBlob,
+    RepoFileReview,
     RepoFileSnapshot,
     InterventionRecord,
     UniversityBatchUpload,
 )
+from .http_transport import http_json
+from .code_chunker import chunk_code, estimate_tokens, normalized_chunk_hash
+from .llm_cache import llm_cache_get, llm_cache_key, llm_cache_metrics, llm_cache_set
+from .llm_client import llm_chat_completion, llm_client_metrics, llm_deadline
+from .similarity import find_similar_repositories, index_file_fingerprints, unindexed_shas
+from .github import GITHUB_API_ROOT, GITHUB_RAW_ACCEPT, github_json, github_scheduler, github_stream, github_text
 from .serializers import (
     SkillSerializer,
     ActivitySerializer,
@@ -47,7 +62,15 @@ from .serializers import (
     VerificationStepSerializer,
 )
 from accounts.models import User
-from accounts.scoring import calculate_student_scores, score_breakdown, upsert_scorecards
+from accounts.scoring import (
+    SCORE_FORMULA_VERSION,
+    calculate_student_scores,
+    enqueue_score_recompute,
+    score_breakdown,
+    score_formula_metrics,
+    scorecards_outdated,
+    upsert_scorecards,
+)
 from content.models import ContentBlock
 
 def _bool(value):
@@ -464,25 +487,160 @@ def _repo_cache_enabled():
     return os.environ.get("AI_REPO_CACHE_ENABLED", "true").strip().lower() in {"1", "true", "yes"}
 
 
-def _repo_cache_max_chars():
+def _load_repo_blobs(shas):
+    if not shas or not _repo_cache_enabled():
+        return {}
+    blobs = {}
+    for blob_id, sha, data in RepoBlob.objects.filter(sha__in=set(shas)).values_list("id", "sha", "data"):
+        try:
+            blobs[sha] = (blob_id, zlib.decompress(bytes(data)).decode("utf-8"))
+        except (zlib.error, UnicodeDecodeError):
+            continue
+    return blobs
+
+
+_BLOB_SEGMENT_LINES = 256
+_BLOB_READ_CHUNK = 16384
+
+
+def _compress_blob_text(content):
+    # The stream is still one ordinary zlib stream, but a full flush every
+    # _BLOB_SEGMENT_LINES lines resets the compressor so a reader can start
+    # inflating at any recorded offset instead of at the top of the file.
+    data = content.encode("utf-8")
+    compressor = zlib.compressobj()
+    output = bytearray()
+    offsets = []
+    position = 0
+    while position < len(data):
+        offsets.append(len(output))
+        end = position
+        for _ in range(_BLOB_SEGMENT_LINES):
+            end = data.find(b"\n", end) + 1
+            if not end:
+                end = len(data)
+                break
+        output += compressor.compress(data[position:end])
+        output += compressor.flush(zlib.Z_FULL_FLUSH)
+        position = end
+    output += compressor.flush()
+    if len(offsets) < 2:
+        return bytes(output), {}
+    return bytes(output), {"segment_lines": _BLOB_SEGMENT_LINES, "offsets": offsets}
+
+
+def _read_blob_lines(blob, start_line, end_line):
+    # Returns lines start_line..end_line (1-based, inclusive) while inflating
+    # only the segments that cover them. Blobs without an index are read from
+    # the top but still stop as soon as the window is complete.
+    data = bytes(blob.data)
+    index = blob.line_index if isinstance(blob.line_index, dict) else {}
+    offsets = index.get("offsets") or []
+    segment_lines = _safe_int(index.get("segment_lines"), default=0)
+    segment = min((start_line - 1) // segment_lines, len(offsets) - 1) if offsets and segment_lines else 0
+    if segment > 0:
+        decompressor = zlib.decompressobj(-zlib.MAX_WBITS)
+        position = offsets[segment]
+    else:
+        decompressor = zlib.decompressobj()
+        position = 0
+    first_line = segment * segment_lines + 1
+    wanted = end_line - first_line + 1
+    buffer = bytearray()
+    newlines = 0
     try:
-        return int(os.environ.get("AI_REPO_CACHE_CHARS", "20000"))
-    except (TypeError, ValueError):
-        return 20000
+        while position < len(data) and not decompressor.eof and newlines < wanted:
+            chunk = decompressor.decompress(data[position:position + _BLOB_READ_CHUNK])
+            newlines += chunk.count(b"\n")
+            buffer += chunk
+            position += _BLOB_READ_CHUNK
+    except zlib.error:
+        return []
+    lines = buffer.split(b"\n")[:wanted]
+    return [line.decode("utf-8", errors="replace") for line in lines[start_line - first_line:]]
+
+
+def _store_repo_blobs(contents):
+    # Blobs are keyed by git SHA, so identical files are stored once no matter
+    # how many students or re-analyses reference them.
+    if not contents or not _repo_cache_enabled():
+        return {}
+    blobs = []
+    for sha, content in contents.items():
+        data, line_index = _compress_blob_text(content)
+        blobs.append(RepoBlob(
+            sha=sha,
+            data=data,
+            size=len(content),
+            lines=content.count("\n") + 1 if content else 0,
+            line_index=line_index,
+        ))
+    RepoBlob.objects.bulk_create(blobs, ignore_conflicts=True)
+    return dict(RepoBlob.objects.filter(sha__in=list(contents)).values_list("sha", "id"))
 
 
-def _store_repo_file_snapshot(user, repo_url, path, sha, content, size, lines):
-    if not user or not _repo_cache_enabled():
+def _repo_blob_ids(shas):
+    if not shas or not _repo_cache_enabled():
+        return {}
+    return dict(RepoBlob.objects.filter(sha__in=set(shas)).values_list("sha", "id"))
+
+
+def _load_file_reviews(files):
+    # A stored review is only reused while its blob is still in the store, so
+    # the snapshot (and file preview) for that file can still be linked.
+    if not _repo_cache_enabled():
+        return {}
+    keys = {(item.get("sha"), item.get("path")) for item in files if item.get("sha") and item.get("path")}
+    shas = {sha for sha, _path in keys}
+    rows = RepoFileReview.objects.filter(
+        sha__in=shas,
+        review_version=FILE_REVIEW_VERSION,
+    ).filter(sha__in=RepoBlob.objects.filter(sha__in=shas).values("sha"))
+    return {
+        (row.sha, row.path): (row.review, row.lines)
+        for row in rows
+        if (row.sha, row.path) in keys
+    }
+
+
+def _store_file_reviews(reviews):
+    if not reviews or not _repo_cache_enabled():
+        return
+    RepoFileReview.objects.bulk_create(
+        [
+            RepoFileReview(sha=sha, path=path, review_version=FILE_REVIEW_VERSION, review=review, lines=lines)
+            for (sha, path), (review, lines) in reviews.items()
+        ],
+        ignore_conflicts=True,
+    )
+
+
+def _repo_file_content(owner, repo, sha):
+    cached = _load_repo_blobs([sha]).get(sha)
+    if cached:
+        return cached[1]
+    try:
+        return _fetch_blob_text(owner, repo, sha)
+    except Exception:
+        return None
+
+
+def _snapshot_lines(snapshot, start_line, end_line):
+    if not snapshot.blob_id:
+        return []
+    return _read_blob_lines(snapshot.blob, start_line, end_line)
+
+
+def _store_repo_file_snapshot(user, repo_url, path, sha, blob_id, size, lines):
+    if not user or not blob_id or not _repo_cache_enabled():
         return
-    max_chars = _repo_cache_max_chars()
-    stored_content = content if max_chars <= 0 else (content or "")[:max_chars]
     RepoFileSnapshot.objects.update_or_create(
         user=user,
         repo_url=repo_url,
         path=path,
         sha=sha,
         defaults={
-            "content": stored_content,
+            "blob_id": blob_id,
             "size": size or 0,
             "lines": lines or 0,
         },
@@ -735,34 +893,15 @@ def _extract_github_repo_owner_and_name(repo_url):
     return owner, repo
 
 
-def _http_json(method, url, payload=None, headers=None, timeout=10):
-    if headers is None:
-        headers = {}
-    data = None
-    if payload is not None:
-        data = json.dumps(payload).encode("utf-8")
-        headers.setdefault("Content-Type", "application/json")
-    request = urllib.request.Request(url, data=data, headers=headers, method=method)
-    with urllib.request.urlopen(request, timeout=timeout) as response:
-        return json.loads(response.read().decode("utf-8"))
+def _http_json(method, url, payload=None, headers=None, timeout=None):
+    return http_json(method, url, payload=payload, headers=headers, timeout=timeout)
 
 
-def _github_headers():
-    headers = {
-        "Accept": "application/vnd.github+json",
-        "User-Agent": "skillsence-ai",
-    }
-    token = os.environ.get("GITHUB_TOKEN")
-    if token:
-        headers["Authorization"] = f"Bearer {token}"
-    return headers
-
-
-def _fetch_repo_languages(languages_url, headers):
+def _fetch_repo_languages(languages_url):
     if not languages_url:
         return []
     try:
-        data = _http_json("GET", languages_url, headers=headers)
+        data = github_json(languages_url)
     except Exception:
         return []
     if not isinstance(data, dict):
@@ -771,10 +910,10 @@ def _fetch_repo_languages(languages_url, headers):
     return [lang for lang, _ in sorted_langs[:5]]
 
 
-def _fetch_repo_commits(owner, repo, headers):
-    url = f"https://api.github.com/repos/{owner}/{repo}/commits?per_page=20"
+def _fetch_repo_commits(owner, repo):
+    url = f"{GITHUB_API_ROOT}/repos/{owner}/{repo}/commits?per_page=20"
     try:
-        data = _http_json("GET", url, headers=headers)
+        data = github_json(url)
     except Exception:
         return []
     if not isinstance(data, list):
@@ -782,15 +921,10 @@ def _fetch_repo_commits(owner, repo, headers):
     return data
 
 
-def _fetch_repo_readme(owner, repo, headers):
-    url = f"https://api.github.com/repos/{owner}/{repo}/readme"
-    readme_headers = dict(headers)
-    readme_headers["Accept"] = "application/vnd.github.raw+json"
+def _fetch_repo_readme(owner, repo):
+    url = f"{GITHUB_API_ROOT}/repos/{owner}/{repo}/readme"
     try:
-        req = urllib.request.Request(url, headers=readme_headers, method="GET")
-        with urllib.request.urlopen(req, timeout=10) as response:
-            content = response.read().decode("utf-8", errors="ignore")
-            return content[:4000]
+        return github_text(url, accept=GITHUB_RAW_ACCEPT)[:4000]
     except Exception:
         return ""
 
@@ -842,15 +976,14 @@ def _ai_signal_from_commits(commits):
 
 
 def _analyze_repo(owner, repo):
-    headers = _github_headers()
-    repo_url = f"https://api.github.com/repos/{owner}/{repo}"
-    repo_data = _http_json("GET", repo_url, headers=headers)
+    repo_url = f"{GITHUB_API_ROOT}/repos/{owner}/{repo}"
+    repo_data = github_json(repo_url)
     if not isinstance(repo_data, dict):
         return None
 
-    languages = _fetch_repo_languages(repo_data.get("languages_url"), headers)
-    commits = _fetch_repo_commits(owner, repo, headers)
-    readme_text = _fetch_repo_readme(owner, repo, headers)
+    languages = _fetch_repo_languages(repo_data.get("languages_url"))
+    commits = _fetch_repo_commits(owner, repo)
+    readme_text = _fetch_repo_readme(owner, repo)
 
     ai_score = max(_ai_signal_from_commits(commits), _ai_signal_from_text(readme_text))
     ai_generated = "likely" if ai_score >= 40 else "possible" if ai_score >= 20 else "no_signal"
@@ -883,30 +1016,11 @@ def _analyze_repo(owner, repo):
         "created_at": timezone.now().isoformat(),
     }
 
-def _llm_headers(api_key):
-    return {
-        "Authorization": f"Bearer {api_key}",
-        "Accept": "application/json",
-        "User-Agent": "skillsence-ai",
-    }
-
-
-def _llm_chat_completion(payload, timeout=20):
+def _llm_chat_completion(payload):
     api_key = os.environ.get("OPENAI_API_KEY")
     if not api_key:
         return None
-    url = os.environ.get("OPENAI_API_BASE", "https://api.openai.com/v1/chat/completions")
-    try:
-        data = _http_json("POST", url, payload=payload, headers=_llm_headers(api_key), timeout=timeout)
-    except urllib.error.HTTPError as exc:
-        try:
-            body = exc.read().decode("utf-8", errors="ignore")
-        except Exception:
-            body = ""
-        return {"error": {"status": exc.code, "body": body}}
-    except Exception:
-        return None
-    return data
+    return llm_chat_completion(payload, api_key, url=os.environ.get("OPENAI_API_BASE"))
 
 
 def _llm_message_content(data):
@@ -916,8 +1030,24 @@ def _llm_message_content(data):
         return ""
 
 
-def _openai_chat_json(system_content, user_content, max_tokens=700):
+def _openai_chat_json(system_content, user_content, max_tokens=700, cache_key=None, cache_kind="", cache=True):
+    # Identical prompts (same model, text and limits) return the stored reply
+    # instead of another paid call; callers with a cheaper identity for the
+    # prompt, such as a blob SHA, pass their own cache_key.
     model = os.environ.get("OPENAI_MODEL", "gpt-4o-mini")
+    if not cache:
+        return _openai_chat_json_uncached(model, system_content, user_content, max_tokens)
+    cache_key = cache_key or llm_cache_key(model, system_content, user_content, max_tokens, 0.2)
+    cached = llm_cache_get(cache_key, kind=cache_kind)
+    if cached is not None:
+        return cached
+    parsed = _openai_chat_json_uncached(model, system_content, user_content, max_tokens)
+    if parsed is not None:
+        llm_cache_set(cache_key, parsed, kind=cache_kind)
+    return parsed
+
+
+def _openai_chat_json_uncached(model, system_content, user_content, max_tokens):
     messages = [
         {"role": "system", "content": system_content},
         {"role": "user", "content": user_content},
@@ -929,7 +1059,12 @@ def _openai_chat_json(system_content, user_content, max_tokens=700):
         "max_tokens": max_tokens,
         "response_format": {"type": "json_object"},
     }
-    data = _llm_chat_completion(payload, timeout=20)
+    data = _llm_chat_completion(payload)
+    if data is None:
+        # Unreachable, out of time, or the circuit is open: a reworded prompt
+        # won't help. A rejected request ({"error": ...}) still gets the retry
+        # below, since some compatible endpoints refuse JSON mode with a 4xx.
+        return None
     content = _llm_message_content(data)
     parsed = _safe_json_loads(content)
     if parsed is not None:
@@ -956,7 +1091,7 @@ def _openai_chat_json(system_content, user_content, max_tokens=700):
         "temperature": 0.1,
         "max_tokens": max_tokens,
     }
-    data = _llm_chat_completion(fallback_payload, timeout=20)
+    data = _llm_chat_completion(fallback_payload)
     try:
         content = _llm_message_content(data)
         return _safe_json_loads(content)
@@ -975,26 +1110,15 @@ def _is_text_path(path):
     return ext not in binary_exts
 
 
-def _chunk_text(text, max_chars):
-    if max_chars <= 0:
-        max_chars = 6000
-    chunks = []
-    start = 0
-    length = len(text)
-    while start < length:
-        chunks.append(text[start:start + max_chars])
-        start += max_chars
-    return chunks
+def _fetch_repo_tree(owner, repo, default_branch):
+    tree_url = f"{GITHUB_API_ROOT}/repos/{owner}/{repo}/git/trees/{default_branch}?recursive=1"
+    return github_json(tree_url)
 
 
-def _fetch_repo_tree(owner, repo, headers, default_branch):
-    tree_url = f"https://api.github.com/repos/{owner}/{repo}/git/trees/{default_branch}?recursive=1"
-    return _http_json("GET", tree_url, headers=headers)
-
-
-def _fetch_blob_text(owner, repo, sha, headers):
-    url = f"https://api.github.com/repos/{owner}/{repo}/git/blobs/{sha}"
-    data = _http_json("GET", url, headers=headers)
+def _fetch_blob_text(owner, repo, sha):
+    url = f"{GITHUB_API_ROOT}/repos/{owner}/{repo}/git/blobs/{sha}"
+    # Blobs are addressed by content SHA, so there is nothing to revalidate.
+    data = github_json(url, conditional=False)
     if not isinstance(data, dict):
         return None
     if data.get("encoding") != "base64":
@@ -1011,6 +1135,108 @@ def _repo_analysis_max_files():
     return max(4, min(24, value))
 
 
+def _repo_fetch_workers():
+    value = _safe_int(os.environ.get("AI_REPO_FETCH_WORKERS"), default=6)
+    return max(1, min(16, value))
+
+
+def _repo_analysis_deadline():
+    try:
+        return max(1.0, float(os.environ.get("AI_REPO_ANALYSIS_DEADLINE_SECONDS", "45")))
+    except (TypeError, ValueError):
+        return 45.0
+
+
+def _run_fetch_task(func, *args):
+    try:
+        return func(*args)
+    finally:
+        close_old_connections()
+
+
+def _fetch_repo_inputs(owner, repo, languages_url, files, deadline, cached_blobs=None, on_progress=None, include_metadata=True):
+    # Metadata and blob downloads are independent round trips, so they share one
+    # bounded pool. Results come back keyed by submission order; anything still
+    # running at the deadline is dropped and reported as missing.
+    executor = ThreadPoolExecutor(max_workers=_repo_fetch_workers(), thread_name_prefix="repo-fetch")
+    cached_blobs = cached_blobs or {}
+    tasks = {}
+    results = {}
+
+    def submit(key, func, *args):
+        # Each task runs in a copy of the caller's context so the GitHub request
+        # priority set by background jobs carries over to the pool threads.
+        tasks[key] = executor.submit(contextvars.copy_context().run, _run_fetch_task, func, *args)
+
+    try:
+        submit("languages", _fetch_repo_languages, languages_url)
+        if include_metadata:
+            submit("commits", _fetch_repo_commits, owner, repo)
+            submit("readme", _fetch_repo_readme, owner, repo)
+        for index, item in enumerate(files):
+            if not item.get("path") or not item.get("sha"):
+                continue
+            if item["sha"] in cached_blobs:
+                results[index] = cached_blobs[item["sha"]][1]
+            else:
+                submit(index, _fetch_blob_text, owner, repo, item["sha"])
+        blob_tasks = [future for key, future in tasks.items() if isinstance(key, int)]
+        pending = set(tasks.values())
+        while pending:
+            done, pending = wait(pending, timeout=max(0.0, deadline - time.monotonic()), return_when=FIRST_COMPLETED)
+            if not done or any(future.exception() for future in done):
+                break
+            if on_progress:
+                on_progress(
+                    len(results) + sum(1 for future in blob_tasks if future.done()),
+                    len(results) + len(blob_tasks),
+                )
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    missing = set()
+    for key, future in tasks.items():
+        if future.done() and not future.cancelled():
+            results[key] = future.result()
+        else:
+            missing.add(key)
+    return results, missing
+
+
+def _repo_fetch_mode():
+    mode = os.environ.get("AI_REPO_FETCH_MODE", "blobs").strip().lower()
+    return mode if mode in {"blobs", "tarball"} else "blobs"
+
+
+def _repo_tarball_max_files():
+    value = _safe_int(os.environ.get("AI_REPO_TARBALL_MAX_FILES"), default=60)
+    return max(4, min(200, value))
+
+
+def _repo_tarball_max_bytes():
+    value = _safe_int(os.environ.get("AI_REPO_TARBALL_MAX_BYTES"), default=100 * 1024 * 1024)
+    return max(1024 * 1024, value)
+
+
+def _repo_preview_lines():
+    value = _safe_int(os.environ.get("AI_REPO_PREVIEW_LINES"), default=200)
+    return max(20, min(2000, value))
+
+
+def _encode_preview_cursor(sha, line):
+    return base64.urlsafe_b64encode(f"{sha}:{line}".encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def _decode_preview_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("utf-8")
+        sha, line = raw.rsplit(":", 1)
+        line = int(line)
+    except (ValueError, UnicodeDecodeError):
+        return None, None
+    return (sha, line) if line >= 1 else (None, None)
+
+
 def _repo_preview_chars():
     value = _safe_int(os.environ.get("AI_REPO_PREVIEW_CHARS"), default=4000)
     return max(500, min(12000, value))
@@ -1068,39 +1294,83 @@ def _repo_file_role(path):
     return "source"
 
 
-def _select_repo_files_for_review(files):
-    role_rank = {
-        "source": 0,
-        "test": 1,
-        "configuration": 2,
-        "ci": 3,
-        "tooling": 4,
-        "documentation": 5,
+_REPO_ROLE_RANK = {
+    "source": 0,
+    "test": 1,
+    "configuration": 2,
+    "ci": 3,
+    "tooling": 4,
+    "documentation": 5,
+}
+
+
+def _repo_review_candidate(item):
+    path = item.get("path") or ""
+    if not path or _should_skip_repo_path(path) or not _is_text_path(path):
+        return None
+    size = _safe_int(item.get("size"), default=0)
+    if size > 250000:
+        return None
+    return {
+        "path": path,
+        "sha": item.get("sha"),
+        "size": size,
+        "role": _repo_file_role(path),
     }
-    selected = []
-    for item in files:
-        path = item.get("path") or ""
-        if not path or _should_skip_repo_path(path) or not _is_text_path(path):
-            continue
-        size = _safe_int(item.get("size"), default=0)
-        if size > 250000:
-            continue
-        role = _repo_file_role(path)
-        selected.append({
-            "path": path,
-            "sha": item.get("sha"),
-            "size": size,
-            "role": role,
-        })
-    selected.sort(
-        key=lambda item: (
-            role_rank.get(item["role"], 99),
-            -min(item["size"], 50000),
-            item["path"].count("/"),
-            item["path"],
-        )
+
+
+def _repo_review_rank(item):
+    return (
+        _REPO_ROLE_RANK.get(item["role"], 99),
+        -min(item["size"], 50000),
+        item["path"].count("/"),
+        item["path"],
     )
-    return selected[:_repo_analysis_max_files()]
+
+
+def _select_repo_files_for_review(files, max_files=None):
+    selected = [candidate for candidate in map(_repo_review_candidate, files) if candidate]
+    selected.sort(key=_repo_review_rank)
+    return selected[:max_files or _repo_analysis_max_files()]
+
+
+def _git_blob_sha(data):
+    return hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()
+
+
+def _fetch_repo_archive(owner, repo, ref, max_files):
+    # One streamed tarball replaces the tree call plus a request per blob. The
+    # file list is collected from member headers, and only members that pass
+    # the review filters are read; the best candidates are kept as we go so
+    # memory stays bounded by max_files.
+    url = f"{GITHUB_API_ROOT}/repos/{owner}/{repo}/tarball/{ref}"
+    max_bytes = _repo_tarball_max_bytes()
+    files = []
+    candidates = []
+    total_bytes = 0
+    with github_stream(url) as stream, tarfile.open(fileobj=stream, mode="r|gz") as archive:
+        for member in archive:
+            if not member.isfile():
+                continue
+            # GitHub nests every entry under an "<owner>-<repo>-<sha>/" directory.
+            path = member.name.partition("/")[2]
+            if not path:
+                continue
+            total_bytes += member.size
+            if total_bytes > max_bytes:
+                raise ValueError("Repository archive exceeds AI_REPO_TARBALL_MAX_BYTES.")
+            node = {"type": "blob", "path": path, "size": member.size}
+            files.append(node)
+            candidate = _repo_review_candidate(node)
+            if not candidate:
+                continue
+            data = archive.extractfile(member).read()
+            candidate["sha"] = _git_blob_sha(data)
+            candidate["content"] = data.decode("utf-8", errors="ignore")
+            candidates.append(candidate)
+            if len(candidates) >= max_files * 2:
+                candidates = sorted(candidates, key=_repo_review_rank)[:max_files]
+    return files, sorted(candidates, key=_repo_review_rank)[:max_files]
 
 
 def _repo_tree_overview(files):
@@ -1231,15 +1501,166 @@ def _commit_activity_payload(commits):
     }
 
 
-def _count_secret_hits(content):
-    patterns = [
+# Stored per-file reviews are keyed by this version; bump it whenever
+# _heuristic_file_review would produce different output for the same file.
+FILE_REVIEW_VERSION = 2
+
+
+_SECRET_PATTERNS = tuple(
+    re.compile(pattern, re.IGNORECASE)
+    for pattern in (
         r"-----BEGIN [A-Z ]+PRIVATE KEY-----",
         r"api[_-]?key\s*[:=]\s*['\"][^'\"]+['\"]",
         r"secret[_-]?key\s*[:=]\s*['\"][^'\"]+['\"]",
         r"password\s*[:=]\s*['\"][^'\"]+['\"]",
         r"token\s*[:=]\s*['\"][^'\"]+['\"]",
-    ]
-    return sum(len(re.findall(pattern, content, flags=re.IGNORECASE)) for pattern in patterns)
+    )
+)
+# Every secret pattern needs one of these words; triggers are matched against
+# the casefolded text and avoid "i", whose dotless form survives casefolding.
+_SECRET_TRIGGERS = ("key", "password", "token")
+
+# Counters filled by _scan_file_content. Each entry is (counter, compiled
+# pattern, trigger substrings, match against casefolded text). Patterns that
+# may span lines or overlap one another keep their own finditer pass, but
+# that pass only runs when a trigger substring shows it can match at all.
+_FILE_SCAN_RULES = (
+    (
+        "functions",
+        re.compile(r"^\s*(async\s+def|def|function|const\s+\w+\s*=\s*\(|export\s+function|public\s+\w+\s*\()", re.MULTILINE),
+        ("def", "function", "const", "public"),
+        False,
+    ),
+    ("classes", re.compile(r"^\s*class\s+\w+", re.MULTILINE), ("class",), False),
+    ("test_asserts", re.compile(r"\b(assert|expect\(|self\.assert|pytest)\b"), ("assert", "expect(", "pytest"), False),
+    ("todo_count", re.compile(r"\b(TODO|FIXME|HACK)\b", re.IGNORECASE), ("todo", "xme", "hack"), True),
+    ("debug_hits", re.compile(r"\b(console\.log|print\(|debugger\b)\b"), ("console.log", "print(", "debugger"), False),
+    ("bare_excepts", re.compile(r"^\s*except\s*:\s*$", re.MULTILINE), ("except",), False),
+    ("eval_hits", re.compile(r"\b(eval|exec)\s*\("), ("eval", "exec"), False),
+    ("shell_true_hits", re.compile(r"shell\s*=\s*True"), ("shell",), False),
+)
+_COMMENT_PREFIXES = ("#", "//", "/*", "*", "<!--")
+
+
+def _count_secret_hits(content, folded=None):
+    folded = content.casefold() if folded is None else folded
+    if not any(trigger in folded for trigger in _SECRET_TRIGGERS):
+        return 0
+    return sum(len(pattern.findall(content)) for pattern in _SECRET_PATTERNS)
+
+
+def _scan_file_content(content, skip=()):
+    lines = content.splitlines()
+    counts = {
+        "line_count": len(lines),
+        "non_empty": 0,
+        "comment_lines": 0,
+        "long_lines": 0,
+    }
+    for line in lines:
+        if len(line) > 120:
+            counts["long_lines"] += 1
+        stripped = line.strip()
+        if stripped:
+            counts["non_empty"] += 1
+            if stripped.startswith(_COMMENT_PREFIXES):
+                counts["comment_lines"] += 1
+
+    folded = content.casefold()
+    for name, pattern, triggers, use_folded in _FILE_SCAN_RULES:
+        if name in skip:
+            continue
+        haystack = folded if use_folded else content
+        if any(trigger in haystack for trigger in triggers):
+            counts[name] = sum(1 for _match in pattern.finditer(content))
+        else:
+            counts[name] = 0
+    counts["secret_hits"] = _count_secret_hits(content, folded)
+    return counts
+
+
+_AST_FUNCTION_NODES = frozenset({ast.FunctionDef, ast.AsyncFunctionDef})
+_AST_BRANCH_NODES = frozenset({ast.If, ast.IfExp, ast.For, ast.AsyncFor, ast.While, ast.ExceptHandler, ast.match_case})
+_AST_BLOCK_NODES = frozenset(
+    node
+    for node in (ast.If, ast.For, ast.AsyncFor, ast.While, ast.With, ast.AsyncWith, ast.Try, getattr(ast, "TryStar", None), ast.Match)
+    if node is not None
+)
+# Counters the AST walk replaces; the matching regex passes are skipped.
+_AST_COUNTERS = ("functions", "classes", "bare_excepts", "eval_hits", "shell_true_hits")
+
+
+def _python_ast_max_chars():
+    value = _safe_int(os.environ.get("AI_REPO_AST_MAX_CHARS"), default=100000)
+    return max(0, value)
+
+
+def _python_ast_metrics(content):
+    # One iterative walk over the parsed module. Returns None when the file is
+    # too large or does not parse, so callers fall back to the regex counters.
+    if len(content) > _python_ast_max_chars():
+        return None
+    try:
+        tree = ast.parse(content)
+    except (SyntaxError, ValueError, RecursionError, MemoryError):
+        return None
+
+    functions = classes = bare_excepts = eval_hits = shell_true_hits = 0
+    complexities = []
+    max_nesting = 0
+    stack = [(tree, 0, None)]
+    while stack:
+        node, depth, function = stack.pop()
+        node_type = type(node)
+        if node_type in _AST_FUNCTION_NODES:
+            functions += 1
+            complexities.append(1)
+            function = len(complexities) - 1
+            depth = 0
+        elif node_type is ast.ClassDef:
+            classes += 1
+        elif function is not None:
+            if node_type in _AST_BRANCH_NODES:
+                complexities[function] += 1
+            elif node_type is ast.BoolOp:
+                complexities[function] += len(node.values) - 1
+            elif node_type is ast.comprehension:
+                complexities[function] += 1 + len(node.ifs)
+
+        if node_type is ast.ExceptHandler:
+            if node.type is None:
+                bare_excepts += 1
+        elif node_type is ast.Call:
+            if type(node.func) is ast.Name and node.func.id in ("eval", "exec"):
+                eval_hits += 1
+            for keyword in node.keywords:
+                if keyword.arg == "shell" and type(keyword.value) is ast.Constant and keyword.value.value is True:
+                    shell_true_hits += 1
+
+        child_depth = depth
+        if node_type in _AST_BLOCK_NODES:
+            child_depth = depth + 1
+            if child_depth > max_nesting:
+                max_nesting = child_depth
+            if node_type is ast.If and len(node.orelse) == 1 and type(node.orelse[0]) is ast.If:
+                # An elif chain stays at the nesting level of its first branch.
+                stack.append((node.orelse[0], depth, function))
+                stack.append((node.test, child_depth, function))
+                stack.extend([(child, child_depth, function) for child in node.body])
+                continue
+        stack.extend([(child, child_depth, function) for child in ast.iter_child_nodes(node)])
+
+    metrics = {
+        "functions": functions,
+        "classes": classes,
+        "bare_excepts": bare_excepts,
+        "eval_hits": eval_hits,
+        "shell_true_hits": shell_true_hits,
+    }
+    metrics["max_complexity"] = max(complexities, default=0)
+    metrics["average_complexity"] = round(sum(complexities) / len(complexities), 1) if complexities else 0
+    metrics["max_nesting"] = max_nesting
+    return metrics
 
 
 def _file_review_summary(role, line_count, strength_count, risk_count):
@@ -1260,25 +1681,22 @@ def _file_review_summary(role, line_count, strength_count, risk_count):
 
 def _heuristic_file_review(path, content):
     role = _repo_file_role(path)
-    lines = content.splitlines()
-    line_count = len(lines)
-    non_empty = [line for line in lines if line.strip()]
-    comment_lines = sum(
-        1
-        for line in non_empty
-        if line.strip().startswith(("#", "//", "/*", "*", "<!--"))
-    )
-    comment_ratio = (comment_lines / len(non_empty)) if non_empty else 0
-    function_count = len(re.findall(r"^\s*(async\s+def|def|function|const\s+\w+\s*=\s*\(|export\s+function|public\s+\w+\s*\()", content, flags=re.MULTILINE))
-    class_count = len(re.findall(r"^\s*class\s+\w+", content, flags=re.MULTILINE))
-    test_asserts = len(re.findall(r"\b(assert|expect\(|self\.assert|pytest)\b", content))
-    todo_count = len(re.findall(r"\b(TODO|FIXME|HACK)\b", content, flags=re.IGNORECASE))
-    long_lines = sum(1 for line in lines if len(line) > 120)
-    secret_hits = _count_secret_hits(content)
-    debug_hits = len(re.findall(r"\b(console\.log|print\(|debugger\b)\b", content))
-    bare_excepts = len(re.findall(r"^\s*except\s*:\s*$", content, flags=re.MULTILINE))
-    eval_hits = len(re.findall(r"\b(eval|exec)\s*\(", content))
-    shell_true_hits = len(re.findall(r"shell\s*=\s*True", content))
+    ast_metrics = _python_ast_metrics(content) if path.lower().endswith(".py") else None
+    counts = _scan_file_content(content, skip=_AST_COUNTERS if ast_metrics else ())
+    counts.update(ast_metrics or {})
+    line_count = counts["line_count"]
+    non_empty = counts["non_empty"]
+    comment_ratio = (counts["comment_lines"] / non_empty) if non_empty else 0
+    function_count = counts["functions"]
+    class_count = counts["classes"]
+    test_asserts = counts["test_asserts"]
+    todo_count = counts["todo_count"]
+    long_lines = counts["long_lines"]
+    secret_hits = counts["secret_hits"]
+    debug_hits = counts["debug_hits"]
+    bare_excepts = counts["bare_excepts"]
+    eval_hits = counts["eval_hits"]
+    shell_true_hits = counts["shell_true_hits"]
     typed_file = path.lower().endswith((".ts", ".tsx", ".pyi"))
     documentation_signal = '"""' in content or "/*" in content or comment_ratio >= 0.08
 
@@ -1309,6 +1727,10 @@ def _heuristic_file_review(path, content):
         risks.append("Several long lines reduce readability and reviewability.")
     if line_count > 500:
         risks.append("Large file likely needs decomposition.")
+    if ast_metrics and ast_metrics["max_complexity"] > 10:
+        risks.append("At least one function has high cyclomatic complexity.")
+    if ast_metrics and ast_metrics["max_nesting"] > 4:
+        risks.append("Deeply nested control flow is hard to follow.")
 
     score = 74
     score += 6 if typed_file else 0
@@ -1325,6 +1747,9 @@ def _heuristic_file_review(path, content):
         score -= 8
     if line_count > 700:
         score -= 10
+    if ast_metrics:
+        score -= min(max(ast_metrics["max_complexity"] - 10, 0) * 2, 12)
+        score -= min(max(ast_metrics["max_nesting"] - 4, 0) * 3, 9)
     score = max(0, min(100, score))
 
     if secret_hits or score < 45:
@@ -1334,7 +1759,7 @@ def _heuristic_file_review(path, content):
     else:
         risk_level = "low"
 
-    return {
+    review = {
         "path": path,
         "role": role,
         "score": score,
@@ -1355,6 +1780,13 @@ def _heuristic_file_review(path, content):
         "risks": risks[:4],
         "summary": _file_review_summary(role, line_count, len(strengths), len(risks)),
     }
+    if ast_metrics:
+        review["complexity"] = {
+            "max": ast_metrics["max_complexity"],
+            "average": ast_metrics["average_complexity"],
+            "max_nesting": ast_metrics["max_nesting"],
+        }
+    return review
 
 
 def _normalize_ai_string_list(value, limit=4):
@@ -1433,32 +1865,126 @@ def _build_repo_risks(tree_overview, commit_activity, file_reviews):
     return risks[:4]
 
 
-def _analyze_repository_work(owner, repo, user=None):
-    headers = _github_headers()
-    repo_api_url = f"https://api.github.com/repos/{owner}/{repo}"
+def _repo_similarity(user, repo_url, reviewed_paths, contents, load_content):
+    # Every reviewed blob joins the fingerprint index (once per SHA), then the
+    # index is asked which other students' repositories share the most code.
+    if not _repo_cache_enabled():
+        return []
+    texts = {}
+    for sha in unindexed_shas(reviewed_paths):
+        content = contents.get(reviewed_paths[sha]) or load_content(sha)
+        if content:
+            texts[sha] = content
+    index_file_fingerprints(texts)
+    if not user:
+        return []
+    return find_similar_repositories(user, list(reviewed_paths), repo_url=repo_url)
+
+
+def _rank_file_reviews(file_reviews):
+    return sorted(
+        file_reviews,
+        key=lambda item: (
+            {"high": 0, "medium": 1, "low": 2}.get(item["risk_level"], 9),
+            item["score"],
+            -item["lines"],
+            item["path"],
+        )
+    )[:12]
+
+
+def _analyze_repository_work(owner, repo, user=None, progress=None):
+    started_at = time.monotonic()
+    progress = progress or (lambda stage, **data: None)
+    repo_api_url = f"{GITHUB_API_ROOT}/repos/{owner}/{repo}"
     try:
-        repo_data = _http_json("GET", repo_api_url, headers=headers)
+        repo_data = github_json(repo_api_url)
     except Exception:
         return {"error": "Unable to fetch repository data."}
     if not isinstance(repo_data, dict):
         return {"error": "Unable to fetch repository data."}
 
     default_branch = repo_data.get("default_branch") or "main"
-    try:
-        tree = _fetch_repo_tree(owner, repo, headers, default_branch)
-    except Exception:
-        return {"error": "Unable to fetch repository tree."}
-    if not isinstance(tree, dict) or not isinstance(tree.get("tree"), list):
-        return {"error": "Unable to fetch repository tree."}
+    archive_contents = None
+    if _repo_fetch_mode() == "tarball":
+        try:
+            files, selected_files = _fetch_repo_archive(owner, repo, default_branch, _repo_tarball_max_files())
+            archive_contents = {index: item.pop("content") for index, item in enumerate(selected_files)}
+        except Exception:
+            archive_contents = None
 
-    files = [node for node in tree.get("tree", []) if node.get("type") == "blob"]
-    selected_files = _select_repo_files_for_review(files)
+    if archive_contents is None:
+        try:
+            tree = _fetch_repo_tree(owner, repo, default_branch)
+        except Exception:
+            return {"error": "Unable to fetch repository tree."}
+        if not isinstance(tree, dict) or not isinstance(tree.get("tree"), list):
+            return {"error": "Unable to fetch repository tree."}
+        files = [node for node in tree.get("tree", []) if node.get("type") == "blob"]
+        selected_files = _select_repo_files_for_review(files)
     if not selected_files:
         return {"error": "No analyzable text files found for this repository."}
 
-    languages = _fetch_repo_languages(repo_data.get("languages_url"), headers)
-    commits = _fetch_repo_commits(owner, repo, headers)
-    readme_text = _fetch_repo_readme(owner, repo, headers)
+    # Files whose blob SHA was already reviewed (by this or any earlier
+    # analysis) are neither fetched nor reviewed again; only the diff is.
+    reused_reviews = _load_file_reviews(selected_files)
+    files_to_fetch = [
+        {} if (item.get("sha"), item.get("path")) in reused_reviews else item
+        for item in selected_files
+    ]
+    if archive_contents is None:
+        cached_blobs = _load_repo_blobs([item.get("sha") for item in files_to_fetch if item.get("sha")])
+    else:
+        cached_blobs = {}
+    progress("fetching_files", files_done=0, files_total=len(selected_files))
+    fetched, missing = _fetch_repo_inputs(
+        owner,
+        repo,
+        repo_data.get("languages_url"),
+        files_to_fetch if archive_contents is None else [],
+        deadline=started_at + _repo_analysis_deadline(),
+        cached_blobs=cached_blobs,
+        on_progress=lambda done, total: progress("fetching_files", files_done=done, files_total=total),
+    )
+    fetched.update(archive_contents or {})
+    return _build_repository_report(
+        repo_data,
+        files,
+        selected_files,
+        fetched,
+        reused_reviews=reused_reviews,
+        cached_blobs=cached_blobs,
+        missing=missing,
+        repo_url=repo_data.get("html_url") or f"https://github.com/{owner}/{repo}",
+        fallback_name=repo,
+        load_content=lambda sha: _repo_file_content(owner, repo, sha),
+        user=user,
+        progress=progress,
+    )
+
+
+def _build_repository_report(
+    repo_data,
+    files,
+    selected_files,
+    fetched,
+    reused_reviews,
+    cached_blobs,
+    missing,
+    repo_url,
+    fallback_name,
+    load_content,
+    user=None,
+    progress=None,
+):
+    # Shared by every source backend: `fetched` maps selected file indexes to
+    # text plus the "languages", "commits" and "readme" inputs, and
+    # `load_content(sha)` returns text for files that were not fetched.
+    progress = progress or (lambda stage, **data: None)
+    default_branch = repo_data.get("default_branch") or "main"
+    languages = fetched.get("languages", [])
+    commits = fetched.get("commits", [])
+    readme_text = fetched.get("readme", "")
     tree_overview = _repo_tree_overview(files)
     architecture_tags = _infer_repo_architecture(files, readme_text, languages)
     commit_activity = _commit_activity_payload(commits)
@@ -1468,42 +1994,78 @@ def _analyze_repository_work(owner, repo, user=None):
     total_score = 0
     total_files = 0
     top_ai_candidates = []
-    repo_html_url = repo_data.get("html_url") or f"https://github.com/{owner}/{repo}"
-
-    for item in selected_files:
+    blob_ids = _store_repo_blobs({
+        item["sha"]: fetched[index]
+        for index, item in enumerate(selected_files)
+        if isinstance(fetched.get(index), str) and item["sha"] not in cached_blobs
+    })
+    blob_ids.update({sha: blob_id for sha, (blob_id, _content) in cached_blobs.items()})
+    blob_ids.update(_repo_blob_ids([sha for sha, _path in reused_reviews]))
+    contents = {}
+    new_reviews = {}
+    reviewed_paths = {}
+    reviewed_files = []
+
+    for index, item in enumerate(selected_files):
         path = item.get("path")
         sha = item.get("sha")
         if not path or not sha:
             continue
-        content = _fetch_blob_text(owner, repo, sha, headers)
-        if content is None:
-            continue
-        lines = content.count("\n") + 1 if content else 0
+        if (sha, path) in reused_reviews:
+            review, lines = reused_reviews[(sha, path)]
+        else:
+            content = fetched.get(index)
+            if content is None:
+                continue
+            lines = content.count("\n") + 1 if content else 0
+            review = _heuristic_file_review(path, content)
+            new_reviews[(sha, path)] = (copy.deepcopy(review), lines)
+            contents[path] = content
         total_lines += lines
+        reviewed_paths[sha] = path
+        reviewed_files.append([path, sha])
         _store_repo_file_snapshot(
             user=user,
-            repo_url=repo_html_url,
+            repo_url=repo_url,
             path=path,
             sha=sha,
-            content=content,
+            blob_id=blob_ids.get(sha),
             size=item.get("size", 0),
             lines=lines,
         )
-        review = _heuristic_file_review(path, content)
         review["size"] = item.get("size", 0)
+        review["sha"] = sha
         file_reviews.append(review)
         total_score += review["score"]
         total_files += 1
         if review["role"] == "source":
-            top_ai_candidates.append((review["risk_level"], -review["score"], -review["lines"], path, content))
+            top_ai_candidates.append((review["risk_level"], -review["score"], -review["lines"], path, sha))
 
     if not file_reviews:
         return {"error": "Unable to load repository source files for analysis."}
-
+    _store_file_reviews(new_reviews)
+    similar_repositories = _repo_similarity(user, repo_url, reviewed_paths, contents, load_content)
+
+    # Heuristic reviews are complete at this point; publish them as partial
+    # results before the slower AI passes run.
+    progress(
+        "ai_review",
+        files_done=len(file_reviews),
+        files_total=len(selected_files),
+        file_reviews=_rank_file_reviews(file_reviews),
+    )
     top_ai_candidates.sort(key=lambda item: ({"high": 0, "medium": 1, "low": 2}.get(item[0], 9), item[1], item[2], item[3]))
     if os.environ.get("OPENAI_API_KEY"):
-        for risk_level, _neg_score, _neg_lines, path, content in top_ai_candidates[:3]:
-            ai_result = _openai_score_code_chunk(path, content[:6000], 0, 1)
+        # The top candidates share one batched request.
+        candidates = []
+        for risk_level, _neg_score, _neg_lines, path, sha in top_ai_candidates[:3]:
+            content = contents.get(path) or load_content(sha)
+            if content:
+                candidates.append((risk_level, path, chunk_code(content, _ai_chunk_tokens())[0], sha))
+        ai_results = _openai_score_code_batch([
+            (path, content, 0, 1, sha) for _risk, path, content, sha in candidates
+        ]) if candidates else []
+        for (risk_level, path, _content, _sha), ai_result in zip(candidates, ai_results):
             if not ai_result:
                 continue
             for review in file_reviews:
@@ -1586,24 +2148,16 @@ def _analyze_repository_work(owner, repo, user=None):
 
     summary = (
         (ai_review or {}).get("summary")
-        or f"{repo_data.get('name') or repo} scored {engineering_score}/100. "
+        or f"{repo_data.get('name') or fallback_name} scored {engineering_score}/100. "
            f"Strongest signals: {', '.join(strengths[:2]) or 'basic project structure'}. "
            f"Main risks: {', '.join(risks[:2]) or 'follow-up engineering review recommended'}."
     )
 
-    file_reviews = sorted(
-        file_reviews,
-        key=lambda item: (
-            {"high": 0, "medium": 1, "low": 2}.get(item["risk_level"], 9),
-            item["score"],
-            -item["lines"],
-            item["path"],
-        )
-    )[:12]
+    file_reviews = _rank_file_reviews(file_reviews)
 
-    return {
-        "repo_name": repo_data.get("name") or repo,
-        "repo_url": repo_html_url,
+    result = {
+        "repo_name": repo_data.get("name") or fallback_name,
+        "repo_url": repo_url,
         "description": repo_data.get("description") or "",
         "summary": summary[:500],
         "engineering_score": engineering_score,
@@ -1617,6 +2171,8 @@ def _analyze_repository_work(owner, repo, user=None):
         "ai_confidence": repo_ai_confidence,
         "languages": languages,
         "files_analyzed": len(file_reviews),
+        "files_reused": total_files - len(new_reviews),
+        "similar_repositories": similar_repositories,
         "lines_analyzed": total_lines,
         "tree_overview": tree_overview,
         "commit_activity": commit_activity,
@@ -1625,6 +2181,8 @@ def _analyze_repository_work(owner, repo, user=None):
         "risks": risks,
         "recommendations": recommendations,
         "file_reviews": file_reviews,
+        # Every reviewed (path, blob sha); file_reviews keeps only the top 12.
+        "reviewed_files": reviewed_files,
         "ai_review": ai_review,
         "stars": repo_data.get("stargazers_count", 0),
         "forks": repo_data.get("forks_count", 0),
@@ -1632,9 +2190,20 @@ def _analyze_repository_work(owner, repo, user=None):
         "default_branch": default_branch,
         "pushed_at": repo_data.get("pushed_at"),
     }
+    if missing:
+        result["partial"] = True
+        result["files_skipped"] = sorted(
+            selected_files[key].get("path") for key in missing if isinstance(key, int)
+        )
+    return result
+
+
+# Cached chunk scores are keyed by this version; bump it whenever the chunk
+# scoring prompts change in a way that should invalidate stored scores.
+CHUNK_SCORE_PROMPT_VERSION = 1
 
 
-def _openai_score_code_chunk(path, chunk, chunk_index, total_chunks):
+def _openai_score_code_chunk(path, chunk, chunk_index, total_chunks, blob_sha=None):
     system = (
         "You are a code forensic analyst. Determine likelihood that the provided code "
         "was AI-generated. Return ONLY JSON with keys: score (0-100), label "
@@ -1646,29 +2215,259 @@ def _openai_score_code_chunk(path, chunk, chunk_index, total_chunks):
         "Analyze the code below:\n\n"
         f"{chunk}"
     )
-    result = _openai_chat_json(system, user, max_tokens=220)
+    cache_key = _chunk_cache_key(blob_sha, chunk, chunk_index, total_chunks)
+    result = _openai_chat_json(system, user, max_tokens=220, cache_key=cache_key, cache_kind="chunk")
+    return _chunk_score_from_result(result)
+
+
+def _chunk_cache_key(blob_sha, chunk, chunk_index, total_chunks):
+    # Keyed by blob and position plus the chunk text itself, since a change
+    # to the chunk budget or overlap cuts the same blob differently. The same
+    # file in a fork, a rename or another student's repository reuses one
+    # scoring.
+    if not blob_sha:
+        return None
+    model = os.environ.get("OPENAI_MODEL", "gpt-4o-mini")
+    chunk_hash = hashlib.sha256(chunk.encode("utf-8")).hexdigest()
+    return llm_cache_key("chunk", CHUNK_SCORE_PROMPT_VERSION, model, blob_sha, chunk_index, total_chunks, chunk_hash)
+
+
+def _chunk_score_from_result(result):
     if not isinstance(result, dict):
         return None
     score = result.get("score")
     label = (result.get("label") or "").strip().lower()
-    if not isinstance(score, (int, float)):
+    if not isinstance(score, (int, float)) or isinstance(score, bool):
         return None
     if label not in {"likely", "possible", "unlikely"}:
         return None
     return {
         "score": max(0, min(100, int(score))),
         "label": label,
-        "rationale": (result.get("rationale") or "").strip()[:200],
+        "rationale": (str(result.get("rationale") or "")).strip()[:200],
     }
 
 
+def _openai_score_code_batch(items):
+    # `items` are (path, chunk, chunk_index, total_chunks, blob_sha) tuples.
+    # Several small chunks share one round trip and the model answers with one
+    # entry per item id. Entries that are missing or malformed fall back to a
+    # single-chunk call, so a sloppy batch reply costs latency, not scores. A
+    # batch call that fails outright leaves its items unscored: the LLM is
+    # unreachable, out of time or short-circuited, and one call per item would
+    # only repeat that failure.
+    if len(items) == 1:
+        return [_openai_score_code_chunk(*items[0])]
+    results = [None] * len(items)
+    pending = []
+    for position, (_path, chunk, chunk_index, total_chunks, blob_sha) in enumerate(items):
+        cache_key = _chunk_cache_key(blob_sha, chunk, chunk_index, total_chunks)
+        cached = _chunk_score_from_result(llm_cache_get(cache_key, kind="chunk")) if cache_key else None
+        if cached:
+            results[position] = cached
+        else:
+            pending.append(position)
+
+    if len(pending) > 1:
+        system = (
+            "You are a code forensic analyst. For every numbered item, determine likelihood that "
+            "the code was AI-generated. Judge each item on its own. Return ONLY JSON of the form "
+            '{"results": [{"id": <item id>, "score": 0-100, "label": "likely|possible|unlikely", '
+            '"rationale": "short string"}]} with exactly one entry per item.'
+        )
+        sections = []
+        for number, position in enumerate(pending, start=1):
+            path, chunk, chunk_index, total_chunks, _blob_sha = items[position]
+            sections.append(
+                f"### Item {number}\n"
+                f"File: {path}\n"
+                f"Chunk {chunk_index + 1} of {total_chunks}\n\n"
+                f"{chunk}"
+            )
+        reply = _openai_chat_json(
+            system,
+            "Analyze each item below:\n\n" + "\n\n".join(sections),
+            max_tokens=min(4000, 120 * len(pending) + 100),
+            cache=False,
+        )
+        if not isinstance(reply, dict):
+            return results
+        entries = reply.get("results")
+        for entry in entries if isinstance(entries, list) else []:
+            if not isinstance(entry, dict):
+                continue
+            number = _safe_int(entry.get("id"), default=0)
+            if not 1 <= number <= len(pending):
+                continue
+            position = pending[number - 1]
+            score = _chunk_score_from_result(entry)
+            if score and results[position] is None:
+                results[position] = score
+                path, chunk, chunk_index, total_chunks, blob_sha = items[position]
+                cache_key = _chunk_cache_key(blob_sha, chunk, chunk_index, total_chunks)
+                if cache_key:
+                    llm_cache_set(cache_key, score, kind="chunk")
+
+    for position in pending:
+        if results[position] is None:
+            results[position] = _openai_score_code_chunk(*items[position])
+    return results
+
+
+def _ai_generated_max_files():
+    value = _safe_int(os.environ.get("AI_GENERATED_MAX_FILES"), default=30)
+    return max(1, min(200, value))
+
+
+def _ai_generated_token_budget():
+    value = _safe_int(os.environ.get("AI_GENERATED_TOKEN_BUDGET"), default=60000)
+    return max(1000, value)
+
+
+def _ai_generated_max_in_flight():
+    value = _safe_int(os.environ.get("AI_GENERATED_MAX_IN_FLIGHT"), default=4)
+    return max(1, min(16, value))
+
+
+def _ai_generated_deadline():
+    try:
+        return max(5.0, float(os.environ.get("AI_GENERATED_DEADLINE_SECONDS", "120")))
+    except (TypeError, ValueError):
+        return 120.0
+
+
+def _ai_generated_batch_tokens():
+    value = _safe_int(os.environ.get("AI_GENERATED_BATCH_TOKENS"), default=4000)
+    return max(500, value)
+
+
+def _ai_generated_batch_max_items():
+    value = _safe_int(os.environ.get("AI_GENERATED_BATCH_MAX_ITEMS"), default=8)
+    return max(1, min(32, value))
+
+
+def _ai_chunk_tokens():
+    # AI_REPO_CHUNK_CHARS predates token sizing and is still honoured.
+    legacy_chars = _safe_int(os.environ.get("AI_REPO_CHUNK_CHARS"), default=0)
+    value = _safe_int(os.environ.get("AI_REPO_CHUNK_TOKENS"), default=legacy_chars // 4 or 1500)
+    return max(200, min(16000, value))
+
+
+def _ai_chunk_overlap_tokens():
+    value = _safe_int(os.environ.get("AI_REPO_CHUNK_OVERLAP_TOKENS"), default=0)
+    return max(0, value)
+
+
+def _estimate_chunk_tokens(chunk):
+    # The chunk itself, plus the fixed prompt and the 220-token reply budget
+    # of _openai_score_code_chunk.
+    return estimate_tokens(chunk) + 300
+
+
+def _schedule_ai_chunks(files, contents, chunk_tokens, token_budget, overlap_tokens=0):
+    # Files arrive in review priority order (source before tests, config and
+    # docs). Chunks are taken breadth-first, so every file gets its opening
+    # chunk scored before any file gets a second one. Chunks that no longer fit
+    # the budget are skipped, but smaller ones later in the order still run.
+    # A chunk whose normalized text was already scheduled is not sent again;
+    # it is returned in `duplicates` with the key of the chunk it repeats.
+    chunked = [
+        (index, chunk_code(contents[index], chunk_tokens, overlap_tokens))
+        for index in range(len(files))
+        if contents.get(index)
+    ]
+    scheduled = []
+    duplicates = []
+    seen = {}
+    skipped = 0
+    spent = 0
+    for depth in range(max((len(chunks) for _index, chunks in chunked), default=0)):
+        for index, chunks in chunked:
+            if depth >= len(chunks):
+                continue
+            chunk = chunks[depth]
+            fingerprint = normalized_chunk_hash(chunk)
+            if fingerprint is not None and fingerprint in seen:
+                duplicates.append((index, depth, len(chunks), chunk, seen[fingerprint]))
+                continue
+            cost = _estimate_chunk_tokens(chunk)
+            if spent + cost > token_budget:
+                skipped += 1
+                continue
+            spent += cost
+            if fingerprint is not None:
+                seen[fingerprint] = len(scheduled)
+            scheduled.append((index, depth, len(chunks), chunk))
+    return scheduled, duplicates, skipped, spent
+
+
+def _batch_ai_chunks(scheduled, batch_tokens, max_items):
+    # Packs scheduled chunks, in schedule order, into prompts of at most
+    # batch_tokens estimated input tokens. A chunk that alone fills half a
+    # batch is sent by itself without closing the batch being filled.
+    batches = []
+    current = []
+    spent = 0
+    for key, (_index, _depth, _total, chunk) in enumerate(scheduled):
+        # Items share the instructions, so each only adds its text and header.
+        cost = estimate_tokens(chunk) + 40
+        if max_items <= 1 or cost * 2 >= batch_tokens:
+            batches.append([key])
+            continue
+        if current and (spent + cost > batch_tokens or len(current) >= max_items):
+            batches.append(current)
+            current = []
+            spent = 0
+        current.append(key)
+        spent += cost
+    if current:
+        batches.append(current)
+    return batches
+
+
+def _score_ai_chunks(files, scheduled, deadline):
+    # A bounded pool keeps at most AI_GENERATED_MAX_IN_FLIGHT requests open.
+    # A failed or late batch is left unscored instead of sinking the analysis.
+    batches = _batch_ai_chunks(scheduled, _ai_generated_batch_tokens(), _ai_generated_batch_max_items())
+    executor = ThreadPoolExecutor(max_workers=_ai_generated_max_in_flight(), thread_name_prefix="ai-chunk")
+    futures = {}
+    try:
+        # Submitted tasks copy the current context, so each LLM call inherits
+        # the analysis deadline and gives up on retries instead of overrunning.
+        with llm_deadline(at=deadline):
+            for keys in batches:
+                items = [
+                    (files[index]["path"], chunk, depth, total, files[index]["sha"])
+                    for index, depth, total, chunk in (scheduled[key] for key in keys)
+                ]
+                futures[executor.submit(
+                    contextvars.copy_context().run,
+                    _run_fetch_task,
+                    _openai_score_code_batch,
+                    items,
+                )] = keys
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, timeout=max(0.0, deadline - time.monotonic()), return_when=FIRST_COMPLETED)
+            if not done:
+                break
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    results = {}
+    for future, keys in futures.items():
+        if future.done() and not future.cancelled() and not future.exception():
+            results.update(zip(keys, future.result()))
+    return results, len(batches)
+
+
 def _analyze_repo_ai_generated(owner, repo, user=None):
+    started_at = time.monotonic()
     if not os.environ.get("OPENAI_API_KEY"):
         return {"error": "OPENAI_API_KEY not configured."}
-    headers = _github_headers()
-    repo_url = f"https://api.github.com/repos/{owner}/{repo}"
+    repo_url = f"{GITHUB_API_ROOT}/repos/{owner}/{repo}"
     try:
-        repo_data = _http_json("GET", repo_url, headers=headers)
+        repo_data = github_json(repo_url)
     except Exception:
         return {"error": "Unable to fetch repository data."}
     if not isinstance(repo_data, dict):
@@ -1676,97 +2475,120 @@ def _analyze_repo_ai_generated(owner, repo, user=None):
 
     default_branch = repo_data.get("default_branch") or "main"
     try:
-        tree = _fetch_repo_tree(owner, repo, headers, default_branch)
+        tree = _fetch_repo_tree(owner, repo, default_branch)
     except Exception:
         return {"error": "Unable to fetch repository tree."}
     if not isinstance(tree, dict) or not isinstance(tree.get("tree"), list):
         return {"error": "Unable to fetch repository tree."}
 
-    files = []
-    for node in tree.get("tree", []):
-        if node.get("type") != "blob":
-            continue
-        path = node.get("path") or ""
-        if not path or not _is_text_path(path):
-            continue
-        files.append({
-            "path": path,
-            "sha": node.get("sha"),
-            "size": node.get("size", 0),
-        })
-
+    nodes = [node for node in tree.get("tree", []) if node.get("type") == "blob"]
+    files = [item for item in _select_repo_files_for_review(nodes, _ai_generated_max_files()) if item.get("sha")]
     if not files:
         return {"error": "No text files found for analysis."}
 
-    chunk_chars = int(os.environ.get("AI_REPO_CHUNK_CHARS", "6000") or 6000)
-    file_scores = []
-    total_weight = 0
-    weighted_score = 0
-    total_lines = 0
+    deadline = started_at + _ai_generated_deadline()
+    cached_blobs = _load_repo_blobs([item["sha"] for item in files])
+    fetched, _missing = _fetch_repo_inputs(
+        owner,
+        repo,
+        repo_data.get("languages_url"),
+        files,
+        deadline=min(deadline, started_at + _repo_analysis_deadline()),
+        cached_blobs=cached_blobs,
+        include_metadata=False,
+    )
+    contents = {index: fetched[index] for index in range(len(files)) if isinstance(fetched.get(index), str)}
+    if not contents:
+        return {"error": "Unable to load repository files."}
 
     repo_html_url = repo_data.get("html_url")
-
-    for item in files:
-        sha = item.get("sha")
-        path = item.get("path")
-        if not sha or not path:
-            return {"error": "Invalid file metadata."}
-        content = _fetch_blob_text(owner, repo, sha, headers)
-        if content is None:
-            return {"error": f"Failed to load {path}."}
+    if user:
+        blob_ids = _store_repo_blobs({
+            files[index]["sha"]: content
+            for index, content in contents.items()
+            if files[index]["sha"] not in cached_blobs
+        })
+        blob_ids.update({sha: blob_id for sha, (blob_id, _content) in cached_blobs.items()})
+    total_lines = 0
+    for index, content in contents.items():
         lines = content.count("\n") + 1 if content else 0
-        _store_repo_file_snapshot(
-            user=user,
-            repo_url=repo_html_url or repo_url,
-            path=path,
-            sha=sha,
-            content=content,
-            size=item.get("size", 0),
-            lines=lines,
-        )
         total_lines += lines
-        chunks = _chunk_text(content, chunk_chars)
-        if not chunks:
-            continue
+        if user:
+            _store_repo_file_snapshot(
+                user=user,
+                repo_url=repo_html_url or repo_url,
+                path=files[index]["path"],
+                sha=files[index]["sha"],
+                blob_id=blob_ids.get(files[index]["sha"]),
+                size=files[index].get("size", 0),
+                lines=lines,
+            )
 
-        chunk_scores = []
-        for idx, chunk in enumerate(chunks):
-            result = _openai_score_code_chunk(path, chunk, idx, len(chunks))
-            if not result:
-                return {"error": f"AI analysis failed for {path}."}
-            chunk_scores.append((result["score"], len(chunk), result["label"]))
+    scheduled, duplicates, skipped, tokens_estimated = _schedule_ai_chunks(
+        files,
+        contents,
+        _ai_chunk_tokens(),
+        _ai_generated_token_budget(),
+        _ai_chunk_overlap_tokens(),
+    )
+    scores, requests = _score_ai_chunks(files, scheduled, deadline)
+
+    per_file = {}
+    for key, (index, _depth, _total, chunk) in enumerate(scheduled):
+        result = scores.get(key)
+        if result:
+            per_file.setdefault(index, []).append((result["score"], len(chunk)))
+    unscored = len(scheduled) - sum(len(items) for items in per_file.values())
+    # Repeated chunks take the score of the copy that was sent.
+    for index, _depth, _total, chunk, key in duplicates:
+        result = scores.get(key)
+        if result:
+            per_file.setdefault(index, []).append((result["score"], len(chunk)))
+    if not per_file:
+        return {"error": "AI analysis failed for every sampled chunk."}
 
-        weighted = sum(score * weight for score, weight, _ in chunk_scores)
-        total = sum(weight for _, weight, _ in chunk_scores) or 1
+    file_scores = []
+    total_weight = 0
+    weighted_score = 0
+    for index, chunk_scores in per_file.items():
+        weighted = sum(score * weight for score, weight in chunk_scores)
+        total = sum(weight for _score, weight in chunk_scores) or 1
         file_score = int(round(weighted / total))
         file_label = "likely" if file_score >= 70 else "possible" if file_score >= 40 else "unlikely"
+        content = contents[index]
         file_scores.append({
-            "path": path,
+            "path": files[index]["path"],
             "score": file_score,
             "label": file_label,
-            "lines": lines,
+            "lines": content.count("\n") + 1 if content else 0,
         })
         total_weight += total
         weighted_score += file_score * total
 
-    if total_weight == 0:
-        return {"error": "No analyzable files."}
-
     repo_score = int(round(weighted_score / total_weight))
     repo_label = "likely" if repo_score >= 70 else "possible" if repo_score >= 40 else "unlikely"
-    top_files = sorted(file_scores, key=lambda f: f["score"], reverse=True)[:5]
+    top_files = sorted(file_scores, key=lambda f: (-f["score"], f["path"]))[:5]
 
-    languages = _fetch_repo_languages(repo_data.get("languages_url"), headers)
-    return {
+    result = {
         "repo_name": repo_data.get("name"),
-        "repo_url": repo_data.get("html_url"),
+        "repo_url": repo_html_url,
         "ai_generated": repo_label,
         "ai_confidence": repo_score,
-        "languages": languages,
+        "languages": fetched.get("languages", []),
         "files_analyzed": len(file_scores),
         "lines_analyzed": total_lines,
         "top_ai_files": top_files,
+        "chunks_scored": len(scheduled) - unscored,
+        "chunks_unscored": unscored,
+        "chunks_over_budget": skipped,
+        "chunks_deduplicated": len(duplicates),
+        "tokens_saved_by_dedup": sum(_estimate_chunk_tokens(chunk) for _index, _depth, _total, chunk, _key in duplicates),
+        "chunk_batches": requests,
+        "tokens_estimated": tokens_estimated,
     }
+    if unscored or skipped:
+        result["partial"] = True
+    return result
 
 def _question_bank():
     return [
@@ -2939,51 +3761,65 @@ def _advanced_session_payload(user, session=None):
         **_advanced_state_payload(session),
     }
 
-def _flag_ai_generated_repos(owner, user=None):
-    headers = _github_headers()
-    repos_url = f"https://api.github.com/users/{owner}/repos?per_page=100&sort=updated"
-    try:
-        repos = _http_json("GET", repos_url, headers=headers)
-    except Exception:
-        return []
+def _ai_generated_repo_item(result):
+    if result.status == "failed":
+        return {
+            "repo_name": result.repo_name,
+            "repo_url": result.repo_url,
+            "status": "failed",
+            "error": result.error,
+        }
+    analysis = result.result or {}
+    if analysis.get("ai_generated") not in {"likely", "possible"}:
+        return None
+    return {
+        "repo_name": analysis.get("repo_name") or result.repo_name,
+        "repo_url": analysis.get("repo_url") or result.repo_url,
+        "ai_generated": analysis.get("ai_generated"),
+        "ai_confidence": analysis.get("ai_confidence", 0),
+        "languages": analysis.get("languages", []),
+        "files_analyzed": analysis.get("files_analyzed", 0),
+        "lines_analyzed": analysis.get("lines_analyzed", 0),
+        "top_ai_files": analysis.get("top_ai_files", []),
+        "analyzed_at": result.analyzed_at.isoformat(),
+    }
+
+
+def _ai_generated_scan_refresh_seconds():
+    return max(60, _safe_int(os.environ.get("AI_GENERATED_SCAN_REFRESH_SECONDS"), default=3600))
 
-    flagged = []
-    if isinstance(repos, list):
-        for repo in repos:
-            repo_name = repo.get("name")
-            if not repo_name:
-                continue
-            analysis = _analyze_repo_ai_generated(owner, repo_name, user=user)
-            if not analysis:
-                continue
-            if analysis.get("error"):
-                flagged.append({
-                    "repo_name": repo_name,
-                    "repo_url": repo.get("html_url"),
-                    "status": "failed",
-                    "error": analysis.get("error"),
-                })
-                continue
-            if analysis.get("ai_generated") in {"likely", "possible"}:
-                flagged.append({
-                    "repo_name": analysis.get("repo_name"),
-                    "repo_url": analysis.get("repo_url"),
-                    "ai_generated": analysis.get("ai_generated"),
-                    "ai_confidence": analysis.get("ai_confidence", 0),
-                    "languages": analysis.get("languages", []),
-                    "files_analyzed": analysis.get("files_analyzed", 0),
-                    "lines_analyzed": analysis.get("lines_analyzed", 0),
-                    "top_ai_files": analysis.get("top_ai_files", []),
-                })
-    return flagged
+
+def _enqueue_ai_generated_scan(user):
+    active = user.ai_generated_scan_jobs.filter(status__in=["queued", "running"]).first()
+    return active or AIGeneratedScanJob.objects.create(user=user, progress={"stage": "queued"})
+
+
+def _ai_generated_scan_payload(job):
+    if not job:
+        return None
+    return {
+        "id": job.id,
+        "status": job.status,
+        "progress": job.progress or {},
+        "error": job.error,
+        "created_at": job.created_at.isoformat(),
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+    }
+
+
+def _flag_outdated_scorecards(student, cards):
+    if student.role == "student" and scorecards_outdated(cards):
+        enqueue_score_recompute(student.id)
 
 
 def _student_score_map(student):
+    cards = list(student.scorecards.all())
     score_map = {
         card.score_type: card.score
-        for card in student.scorecards.all()
+        for card in cards
     }
     if score_map:
+        _flag_outdated_scorecards(student, cards)
         return score_map
     if student.role != "student":
         return {}
@@ -3414,7 +4250,9 @@ def dashboard_view(request):
     user = request.user
     skills = SkillSerializer(user.skills.all(), many=True).data
     activities = ActivitySerializer(user.activities.all()[:10], many=True).data
-    scorecards = ScoreCardSerializer(user.scorecards.all(), many=True).data
+    cards = list(user.scorecards.all())
+    _flag_outdated_scorecards(user, cards)
+    scorecards = ScoreCardSerializer(cards, many=True).data
     steps = VerificationStepSerializer(user.verification_steps.all(), many=True).data
     return Response({
         'skills': skills,
@@ -3445,17 +4283,37 @@ def verification_steps_view(request):
 def recommendations_view(request):
     return Response(_build_recommendations(request.user))
 
-@api_view(['GET'])
+@api_view(['GET', 'POST'])
 @permission_classes([IsAuthenticated])
 def ai_generated_repos_view(request):
+    # Scans run in the analysis worker; this endpoint only serves stored
+    # per-repo results and queues a refresh when the last scan is stale (GET)
+    # or on demand (POST).
     owner = _extract_github_username(request.user.github_link)
     if not owner:
-        return Response({'items': [], 'analyzed_at': None})
-    items = _flag_ai_generated_repos(owner, user=request.user)
-    analyzed_at = timezone.now()
-    request.user.last_analyzed_at = analyzed_at
-    request.user.save(update_fields=["last_analyzed_at"])
-    return Response({'items': items, 'analyzed_at': analyzed_at.isoformat()})
+        return Response({'items': [], 'analyzed_at': None, 'job': None})
+    job = request.user.ai_generated_scan_jobs.order_by('-created_at').first()
+    stale_before = timezone.now() - timedelta(seconds=_ai_generated_scan_refresh_seconds())
+    if (
+        job is None
+        or request.method == 'POST'
+        or (job.status in {'completed', 'failed'} and (job.finished_at or job.created_at) < stale_before)
+    ):
+        job = _enqueue_ai_generated_scan(request.user)
+    items = [
+        item
+        for item in map(_ai_generated_repo_item, request.user.ai_generated_repo_results.all())
+        if item
+    ]
+    analyzed_at = request.user.last_analyzed_at
+    return Response(
+        {
+            'items': items,
+            'analyzed_at': analyzed_at.isoformat() if analyzed_at else None,
+            'job': _ai_generated_scan_payload(job),
+        },
+        status=202 if request.method == 'POST' else 200,
+    )
 
 
 @api_view(['GET'])
@@ -3490,7 +4348,8 @@ def skill_passport_view(request):
                 'evidence_items': evidence_items,
             }
         )
-    scorecards = ScoreCard.objects.filter(user=request.user)
+    scorecards = list(ScoreCard.objects.filter(user=request.user))
+    _flag_outdated_scorecards(request.user, scorecards)
     bar_data = [
         {'name': score.score_type.replace('_', ' ').title(), 'score': score.score}
         for score in scorecards
@@ -3694,6 +4553,7 @@ def ai_interview_view(request):
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
+@llm_deadline()
 def ai_interview_action_view(request):
     action = request.data.get('action')
     if action == 'start':
@@ -4503,12 +5363,12 @@ def _ingest_batch_row(university, row):
             ScoreCard.objects.update_or_create(
                 user=student,
                 score_type=score_type,
-                defaults={"score": score, "change": 0},
+                defaults={"score": score, "change": 0, "formula_version": SCORE_FORMULA_VERSION},
             )
         ScoreSnapshot.objects.update_or_create(
             user=student,
             recorded_on=timezone.localdate(),
-            defaults={"scores": score_map},
+            defaults={"scores": score_map, "formula_version": SCORE_FORMULA_VERSION},
         )
 
     imported_skills = _normalize_string_list(_batch_row_value(row, "student_skills", "skills", "Skills"))
@@ -4770,6 +5630,21 @@ def university_placement_drives_view(request):
 
 
 
+def _code_analysis_payload(report):
+    return {
+        'id': report.id,
+        'repo_name': report.repo_url.rstrip('/').split('/')[-1],
+        'repo_url': report.repo_url,
+        'description': report.summary,
+        'score': report.score,
+        'metrics': report.metrics,
+        'status': report.status,
+        'progress': report.progress,
+        'error': report.error,
+        'created_at': report.created_at.isoformat(),
+    }
+
+
 @api_view(['GET', 'POST'])
 @permission_classes([IsAuthenticated])
 def code_analysis_view(request):
@@ -4782,74 +5657,35 @@ def code_analysis_view(request):
             owner = _extract_github_username(request.user.github_link)
         if not owner or not repo_name:
             return Response({'error': 'Valid GitHub repository URL is required'}, status=400)
-        try:
-            analysis = _analyze_repository_work(owner, repo_name, user=request.user)
-        except Exception:
-            analysis = {"error": "Unable to analyze repository right now."}
-        if not isinstance(analysis, dict) or analysis.get("error"):
-            return Response({'error': (analysis or {}).get("error") or 'Unable to analyze repository'}, status=400)
+        repo_url = f"https://github.com/{owner}/{repo_name}"
+        report = CodeAnalysisReport.objects.filter(user=request.user, repo_url__iexact=repo_url).first()
+        if report is None:
+            report = CodeAnalysisReport.objects.create(
+                user=request.user,
+                repo_url=repo_url,
+                status='queued',
+                progress={"stage": "queued"},
+            )
+        elif report.status not in ('queued', 'running'):
+            # Previous results stay visible until the worker replaces them.
+            report.status = 'queued'
+            report.progress = {"stage": "queued"}
+            report.error = ''
+            report.attempts = 0
+            report.save(update_fields=['status', 'progress', 'error', 'attempts'])
+        return Response(_code_analysis_payload(report), status=202)
+
+    items = [_code_analysis_payload(report) for report in CodeAnalysisReport.objects.filter(user=request.user)]
+    return Response({'items': items})
 
-        report, _ = CodeAnalysisReport.objects.update_or_create(
-            user=request.user,
-            repo_url=analysis['repo_url'],
-            defaults={
-                'summary': analysis.get('summary') or 'Repository engineering analysis.',
-                'score': analysis.get("engineering_score", 0),
-                'metrics': {
-                    "engineering_score": analysis.get("engineering_score", 0),
-                    "maintainability_score": analysis.get("maintainability_score", 0),
-                    "security_score": analysis.get("security_score", 0),
-                    "testing_score": analysis.get("testing_score", 0),
-                    "documentation_score": analysis.get("documentation_score", 0),
-                    "architecture_score": analysis.get("architecture_score", 0),
-                    "originality_score": analysis.get("originality_score", 0),
-                    "ai_generated": analysis.get("ai_generated"),
-                    "ai_confidence": analysis.get("ai_confidence", 0),
-                    "languages": analysis.get("languages", []),
-                    "files_analyzed": analysis.get("files_analyzed", 0),
-                    "lines_analyzed": analysis.get("lines_analyzed", 0),
-                    "tree_overview": analysis.get("tree_overview", {}),
-                    "commit_activity": analysis.get("commit_activity", {}),
-                    "architecture": analysis.get("architecture", []),
-                    "strengths": analysis.get("strengths", []),
-                    "risks": analysis.get("risks", []),
-                    "recommendations": analysis.get("recommendations", []),
-                    "file_reviews": analysis.get("file_reviews", []),
-                    "ai_review": analysis.get("ai_review"),
-                    "stars": analysis.get("stars", 0),
-                    "forks": analysis.get("forks", 0),
-                    "open_issues": analysis.get("open_issues", 0),
-                    "default_branch": analysis.get("default_branch"),
-                    "pushed_at": analysis.get("pushed_at"),
-                },
-                'status': 'completed',
-            },
-        )
-        return Response({
-            "id": report.id,
-            "repo_name": analysis.get("repo_name"),
-            "repo_url": analysis.get("repo_url"),
-            "description": report.summary,
-            "score": report.score,
-            "metrics": report.metrics,
-            "status": report.status,
-            "created_at": report.created_at.isoformat(),
-        })
 
-    items = []
-    for report in CodeAnalysisReport.objects.filter(user=request.user):
-        repo_name = report.repo_url.rstrip('/').split('/')[-1]
-        items.append({
-            'id': report.id,
-            'repo_name': repo_name,
-            'repo_url': report.repo_url,
-            'description': report.summary,
-            'score': report.score,
-            'metrics': report.metrics,
-            'status': report.status,
-            'created_at': report.created_at.isoformat(),
-        })
-    return Response({'items': items})
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def code_analysis_detail_view(request, report_id):
+    report = CodeAnalysisReport.objects.filter(user=request.user, id=report_id).first()
+    if not report:
+        return Response({'error': 'Analysis report not found'}, status=404)
+    return Response(_code_analysis_payload(report))
 
 
 @api_view(['GET'])
@@ -4861,24 +5697,66 @@ def code_analysis_file_view(request, report_id):
     path = (request.query_params.get('path') or '').strip()
     if not path:
         return Response({'error': 'File path is required'}, status=400)
-    snapshot = RepoFileSnapshot.objects.filter(
+    metrics = report.metrics if isinstance(report.metrics, dict) else {}
+    file_reviews = metrics.get("file_reviews", [])
+    review = next((item for item in file_reviews if item.get("path") == path), None)
+    snapshots = RepoFileSnapshot.objects.filter(
         user=request.user,
         repo_url=report.repo_url,
         path=path,
-    ).order_by('-created_at').first()
+    )
+    # Serve the version the report analyzed; older reports without that
+    # record fall back to the newest snapshot of the path.
+    reviewed_sha = next(
+        (entry[1] for entry in metrics.get("reviewed_files") or [] if entry and entry[0] == path),
+        (review or {}).get("sha"),
+    )
+    if reviewed_sha:
+        snapshots = snapshots.filter(sha=reviewed_sha)
+    snapshot = snapshots.select_related('blob').order_by('-created_at').first()
     if not snapshot:
         return Response({'error': 'File preview not found'}, status=404)
-    file_reviews = report.metrics.get("file_reviews", []) if isinstance(report.metrics, dict) else []
-    review = next((item for item in file_reviews if item.get("path") == path), None)
+    total_lines = snapshot.blob.lines if snapshot.blob_id else 0
+    max_lines = _repo_preview_lines()
+    cursor = (request.query_params.get('cursor') or '').strip()
+    if cursor:
+        cursor_sha, start_line = _decode_preview_cursor(cursor)
+        if start_line is None:
+            return Response({'error': 'Invalid cursor'}, status=400)
+        if cursor_sha != snapshot.sha:
+            return Response({'error': 'File changed since the cursor was issued'}, status=409)
+        end_line = start_line + max_lines - 1
+    else:
+        start_line = _safe_int(request.query_params.get('start_line'), default=1)
+        end_line = _safe_int(request.query_params.get('end_line'), default=start_line + max_lines - 1)
+    if start_line < 1 or end_line < start_line or start_line > max(total_lines, 1):
+        return Response({'error': 'Invalid line range'}, status=400)
+    end_line = min(end_line, start_line + max_lines - 1, max(total_lines, 1))
+    # The character budget still applies so a minified file cannot blow up a
+    # response; the window stops at the last whole line that fits and the
+    # cursor resumes right after it.
     preview_chars = _repo_preview_chars()
-    preview = snapshot.content[:preview_chars]
+    shown = []
+    used = 0
+    clipped = False
+    for line in _snapshot_lines(snapshot, start_line, end_line):
+        if shown and used + len(line) + 1 > preview_chars:
+            break
+        clipped = clipped or len(line) > preview_chars
+        shown.append(line[:preview_chars])
+        used += len(line) + 1
+    last_line = start_line + len(shown) - 1
+    more_lines = last_line < total_lines
     return Response({
         'path': snapshot.path,
         'sha': snapshot.sha,
         'size': snapshot.size,
         'lines': snapshot.lines,
-        'preview': preview,
-        'truncated': len(snapshot.content or "") > preview_chars,
+        'start_line': start_line,
+        'end_line': last_line,
+        'preview': "\n".join(shown),
+        'truncated': more_lines or clipped,
+        'next_cursor': _encode_preview_cursor(snapshot.sha, last_line + 1) if more_lines else None,
         'review': review,
     })
 
@@ -5006,7 +5884,7 @@ def performance_view(request):
         ScoreSnapshot.objects.update_or_create(
             user=user,
             recorded_on=today,
-            defaults={"scores": scores},
+            defaults={"scores": scores, "formula_version": SCORE_FORMULA_VERSION},
         )
         snapshots = ScoreSnapshot.objects.filter(user=user, recorded_on__gte=cutoff).order_by("recorded_on")
 
@@ -5022,3 +5900,14 @@ def performance_view(request):
         })
 
     return Response({"series": series})
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def ops_metrics_view(request):
+    return Response({
+        "scoring": score_formula_metrics(),
+        "github_quota": github_scheduler().snapshot(),
+        "llm_cache": llm_cache_metrics(),
+        "llm_client": llm_client_metrics(),
+    })
@@ -93,6 +93,13 @@ interface AnalysisMetrics {
   pushed_at?: string | null;
 }
 
+interface AnalysisProgress {
+  stage?: string;
+  files_done?: number;
+  files_total?: number;
+  file_reviews?: FileReview[];
+}
+
 interface AnalysisItem {
   id: number;
   repo_name?: string;
@@ -101,6 +108,8 @@ interface AnalysisItem {
   score: number;
   metrics: AnalysisMetrics;
   status: string;
+  progress?: AnalysisProgress;
+  error?: string;
   created_at: string;
 }
 
@@ -109,8 +118,11 @@ interface FilePreviewPayload {
   sha: string;
   size: number;
   lines: number;
+  start_line: number;
+  end_line: number;
   preview: string;
   truncated: boolean;
+  next_cursor?: string | null;
   review?: FileReview | null;
 }
 
@@ -130,6 +142,18 @@ const formatLabel = (value: string) =>
     .replace(/_/g, ' ')
     .replace(/\b\w/g, (char) => char.toUpperCase());
 
+const ANALYSIS_POLL_INTERVAL_MS = 3000;
+
+const progressLabel = (progress?: AnalysisProgress) => {
+  if (!progress?.stage) {
+    return 'Queued for analysis...';
+  }
+  if (progress.files_total) {
+    return `${formatLabel(progress.stage)}: ${progress.files_done ?? 0}/${progress.files_total} files`;
+  }
+  return `${formatLabel(progress.stage)}...`;
+};
+
 const riskBadgeVariant = (risk: string) => {
   if (risk === 'high') {
     return 'destructive' as const;
@@ -149,6 +173,7 @@ export default function DashboardCodeAnalysis() {
   const [selectedFilePath, setSelectedFilePath] = useState('');
   const [filePreview, setFilePreview] = useState<FilePreviewPayload | null>(null);
   const [loadingPreview, setLoadingPreview] = useState(false);
+  const [loadingMorePreview, setLoadingMorePreview] = useState(false);
 
   const loadFilePreview = async (reportId: number, path: string) => {
     const token = localStorage.getItem('accessToken');
@@ -177,6 +202,38 @@ export default function DashboardCodeAnalysis() {
     }
   };
 
+  const loadMoreFilePreview = async (reportId: number, current: FilePreviewPayload) => {
+    const token = localStorage.getItem('accessToken');
+    if (!token || !current.next_cursor) {
+      return;
+    }
+    setLoadingMorePreview(true);
+    try {
+      const response = await fetch(
+        buildApiUrl(
+          `/api/skills/code-analysis/${reportId}/file/?path=${encodeURIComponent(current.path)}&cursor=${encodeURIComponent(current.next_cursor)}`,
+        ),
+        {
+          headers: { Authorization: `Bearer ${token}` },
+        },
+      );
+      const data = await response.json().catch(() => ({}));
+      if (!response.ok || data?.error) {
+        return;
+      }
+      setFilePreview({
+        ...data,
+        start_line: current.start_line,
+        preview: `${current.preview}\n${data.preview}`,
+        review: current.review,
+      });
+    } catch {
+      // Keep the lines already shown.
+    } finally {
+      setLoadingMorePreview(false);
+    }
+  };
+
   useEffect(() => {
     const token = localStorage.getItem('accessToken');
     if (!token) {
@@ -238,18 +295,35 @@ export default function DashboardCodeAnalysis() {
         },
         body: JSON.stringify({ repo_url: repoUrl.trim() }),
       });
-      const data = await res.json().catch(() => ({}));
+      let data = await res.json().catch(() => ({}));
       if (!res.ok) {
         setMessage(data?.error || 'Unable to run analysis right now.');
         return;
       }
-      setItems((current) => {
-        const withoutCurrent = current.filter((item) => item.id !== data.id);
-        return [data, ...withoutCurrent];
-      });
+      const upsertItem = (item: AnalysisItem) =>
+        setItems((current) => [item, ...current.filter((entry) => entry.id !== item.id)]);
+      upsertItem(data);
       setSelectedReportId(data.id);
-      setSelectedFilePath(data?.metrics?.file_reviews?.[0]?.path || '');
       setRepoUrl('');
+      // Analysis runs in a background worker; poll the report until it settles.
+      while (data?.status === 'queued' || data?.status === 'running') {
+        setMessage(progressLabel(data.progress));
+        await new Promise((resolve) => setTimeout(resolve, ANALYSIS_POLL_INTERVAL_MS));
+        const statusRes = await fetch(buildApiUrl(`/api/skills/code-analysis/${data.id}/`), {
+          headers: { Authorization: `Bearer ${token}` },
+        });
+        if (!statusRes.ok) {
+          setMessage('Unable to load analysis status right now.');
+          return;
+        }
+        data = await statusRes.json();
+        upsertItem(data);
+      }
+      if (data?.status === 'failed') {
+        setMessage(data?.error || 'Unable to analyze repository.');
+        return;
+      }
+      setSelectedFilePath(data?.metrics?.file_reviews?.[0]?.path || '');
       setMessage('Repository analysis completed.');
     } catch {
       setMessage('Network error. Please try again.');
@@ -575,9 +649,22 @@ export default function DashboardCodeAnalysis() {
                               <pre className="max-h-[420px] overflow-auto rounded-2xl border border-border/50 bg-slate-950 p-4 text-xs text-slate-100 whitespace-pre-wrap break-words">
                                 {filePreview.preview}
                               </pre>
-                              {filePreview.truncated ? (
+                              {filePreview.next_cursor ? (
+                                <div className="flex items-center justify-between gap-3 text-xs text-muted-foreground">
+                                  <span>Showing lines {filePreview.start_line}-{filePreview.end_line} of {filePreview.lines}.</span>
+                                  <Button
+                                    variant="outline"
+                                    size="sm"
+                                    disabled={loadingMorePreview}
+                                    onClick={() => loadMoreFilePreview(selectedReport.id, filePreview)}
+                                  >
+                                    {loadingMorePreview ? <Loader2 className="w-4 h-4 mr-2 animate-spin" /> : null}
+                                    Load more lines
+                                  </Button>
+                                </div>
+                              ) : filePreview.truncated ? (
                                 <div className="text-xs text-muted-foreground">
-                                  Preview truncated. The snapshot stores more content than is shown here.
+                                  Preview truncated. Long lines are shortened in the preview.
                                 </div>
                               ) : null}
                             </div>